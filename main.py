@@ -1,17 +1,21 @@
-from novel_generator.config.settings import load_config
+import asyncio
+
+from novel_generator.config.settings import get_config
 from novel_generator.core.novel_generator import NovelGenerator
 
 def main():
     # 設定の読み込み
-    config = load_config()
+    config = get_config()
 
     # 生成器の初期化
     generator = NovelGenerator(config)
 
     # 物語の生成
-    story = generator.generate_story(
-        max_sections=config["generation"]["max_sections"],
-        total_length=config["generation"]["length"],
+    story = asyncio.run(
+        generator.agenerate_story(
+            max_sections=config.generation.max_sections,
+            total_length=config.generation.length,
+        )
     )
     print(story)
 
@@ -1,18 +1,116 @@
-from typing import Dict
+from dataclasses import MISSING, dataclass, field, fields
+from typing import Any, Dict, Optional, Tuple
+import copy
+import functools
 import yaml
 import os
-import logging
 from logging import getLogger
 
+try:
+    from yaml import CSafeLoader as _Loader
+except ImportError:  # libyamlが利用できない環境
+    from yaml import SafeLoader as _Loader
+
 logger = getLogger(__name__)
 
+# 設定ファイルの解析結果のキャッシュ（パス -> (mtime, サイズ, 設定)）
+_CACHE: Dict[str, Tuple[int, int, Dict]] = {}
+
+
+@dataclass(frozen=True)
+class GenerationConfig:
+    """生成設定"""
+
+    max_sections: int
+    length: str
+    max_concurrency: int
+    parallel_draft: bool
+    context_window: int
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    """アプリケーション設定
+
+    必須の設定が不足している場合はfrom_dictでValueErrorとなる。
+    """
+
+    output_dir: str
+    llm_type: str
+    llm_config: Dict[str, Any]
+    story_setting: str
+    generation: GenerationConfig
+    api_key: Optional[str] = None
+    model: Dict[str, Any] = field(default_factory=dict)
+    logging: Dict[str, Any] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any]) -> "AppConfig":
+        """辞書形式の設定から生成
+
+        Args:
+            config (Dict[str, Any]): デフォルト設定とマージ済みの設定
+
+        Returns:
+            AppConfig: 設定情報
+
+        Raises:
+            ValueError: 必須の設定が不足している場合
+        """
+        values = _known_fields(cls, config)
+        if isinstance(values.get("generation"), dict):
+            values["generation"] = GenerationConfig(
+                **_known_fields(GenerationConfig, values["generation"], "generation.")
+            )
+        return cls(**values)
+
+
+def _known_fields(cls: type, config: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """データクラスのフィールドに対応する設定だけを取り出す
+
+    必須の設定の不足はエラーとし、未知の設定は警告して無視する。
+
+    Args:
+        cls (type): 設定を受け取るデータクラス
+        config (Dict[str, Any]): 設定
+        prefix (str, optional): 警告に表示する設定名の接頭辞
+
+    Returns:
+        Dict[str, Any]: フィールドに対応する設定
+
+    Raises:
+        ValueError: デフォルト値のないフィールドの設定が不足している場合
+    """
+    cls_fields = fields(cls)
+    for f in cls_fields:
+        if (
+            f.name not in config
+            and f.default is MISSING
+            and f.default_factory is MISSING
+        ):
+            raise ValueError(f"必須の設定 '{prefix}{f.name}' が不足しています")
+
+    known = {f.name for f in cls_fields}
+    unknown = config.keys() - known
+    if unknown:
+        names = ", ".join(prefix + key for key in sorted(unknown))
+        logger.warning(f"未知の設定を無視します: {names}")
+
+    return {key: value for key, value in config.items() if key in known}
+
 
 def get_default_config() -> Dict:
     """デフォルト設定の取得"""
     return {
         "api_key": os.environ.get("GEMINI_API_KEY", "YOUR-API-KEY"),
         "output_dir": "novel_output",
-        "generation": {"max_sections": 20, "length": "中編（3万字程度）"},
+        "generation": {
+            "max_sections": 20,
+            "length": "中編（3万字程度）",
+            "max_concurrency": 2,
+            "parallel_draft": False,
+            "context_window": 0,
+        },
         "story_setting": """
         近未来の日本を舞台に、自然との繋がりを失いつつある世界で、
         高校生の主人公が古い伝説に導かれながら神秘的な森の秘密を探る物語。
@@ -29,8 +127,67 @@ def get_default_config() -> Dict:
     }
 
 
-def load_config(config_path: str = "config.yaml") -> Dict:
-    """設定ファイルの読み込み（デフォルト設定対応版）"""
+def _deep_merge(base: Dict, over: Dict) -> Dict:
+    """設定を再帰的にマージ
+
+    辞書同士は再帰的にマージし、それ以外は上書き側の値を採用する。
+
+    Args:
+        base (Dict): ベースとなる設定
+        over (Dict): 上書きする設定
+
+    Returns:
+        Dict: マージされた設定
+    """
+    merged = dict(base)
+    for key, value in over.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _deep_merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def _read_config_file(config_path: str) -> Dict:
+    """設定ファイルの解析（更新がなければキャッシュを返す）
+
+    Args:
+        config_path (str): 設定ファイルのパス
+
+    Returns:
+        Dict: 解析された設定
+    """
+    key = os.path.abspath(config_path)
+    st = os.stat(key)
+
+    cached = _CACHE.get(key)
+    if cached and cached[0] == st.st_mtime_ns and cached[1] == st.st_size:
+        return copy.deepcopy(cached[2])
+
+    with open(key, "r", encoding="utf-8") as f:
+        config = yaml.load(f, Loader=_Loader)
+
+    _CACHE[key] = (st.st_mtime_ns, st.st_size, config)
+    return copy.deepcopy(config)
+
+
+def load_config(config_path: str = "config.yaml") -> AppConfig:
+    """設定ファイルの読み込み（デフォルト設定対応版）
+
+    Args:
+        config_path (str): 設定ファイルのパス
+
+    Returns:
+        AppConfig: 設定情報
+
+    Raises:
+        ValueError: 必須の設定が不足している場合
+    """
+    return AppConfig.from_dict(_load_config_dict(config_path))
+
+
+def _load_config_dict(config_path: str) -> Dict:
+    """設定ファイルを読み込み、デフォルト設定とマージした辞書を返す"""
     default_config = get_default_config()
 
     if not os.path.exists(config_path):
@@ -39,16 +196,26 @@ def load_config(config_path: str = "config.yaml") -> Dict:
         return default_config
 
     try:
-        with open(config_path, "r", encoding="utf-8") as f:
-            config = yaml.safe_load(f)
-            logger.info("設定ファイルを読み込みました")
+        config = _read_config_file(config_path)
+        logger.info("設定ファイルを読み込みました")
 
-            # デフォルト設定とマージ
-            merged_config = default_config.copy()
-            merged_config.update(config)
-            return merged_config
+        # デフォルト設定とマージ（ネストした設定も保持する）
+        return _deep_merge(default_config, config)
 
     except Exception as e:
         logger.error(f"設定ファイルの読み込み中にエラー: {str(e)}")
         logger.info("デフォルト設定を使用します")
         return default_config
+
+
+@functools.lru_cache(maxsize=None)
+def get_config(config_path: str = "config.yaml") -> AppConfig:
+    """設定の取得（初回呼び出し時にのみ読み込む）
+
+    Args:
+        config_path (str): 設定ファイルのパス
+
+    Returns:
+        AppConfig: 設定情報
+    """
+    return load_config(config_path)
@@ -1,8 +1,11 @@
 """小説生成の中核機能を提供するモジュール"""
 
 from typing import Dict, Any
+from pathlib import Path
+import asyncio
 import logging
 
+from ..config.settings import AppConfig
 from ..logging.log_manager import LogManager
 from ..logging.logger import setup_logging
 from .prompt_manager import PromptManager
@@ -16,20 +19,16 @@ logger = logging.getLogger(__name__)
 class NovelGenerator:
     """小説生成を統括するメインクラス"""
 
-    def __init__(self, config: Dict[str, Any]):
+    def __init__(self, config: AppConfig):
         """初期化
 
         Args:
-            config (Dict[str, Any]): 設定情報
-
-        Raises:
-            ValueError: 必須の設定が不足している場合
+            config (AppConfig): 設定情報（必須項目はAppConfig生成時に検証済み）
         """
         self.config = config
-        self._validate_config()
 
         # 出力ディレクトリの設定
-        self.output_dir = "output" + "/" + self.config["output_dir"]
+        self.output_dir = Path("output") / self.config.output_dir
 
         # ロギングの設定
         setup_logging(self.output_dir)
@@ -40,29 +39,16 @@ class NovelGenerator:
 
         logger.info("初期化が完了しました")
 
-    def _validate_config(self) -> None:
-        """設定の検証
-
-        Raises:
-            ValueError: 必須の設定が不足している場合
-        """
-        required_keys = [
-            "output_dir",
-            "llm_type",
-            "llm_config",
-            "story_setting",
-        ]
-
-        for key in required_keys:
-            if key not in self.config:
-                raise ValueError(f"必須の設定 '{key}' が不足しています")
-
     def _initialize_components(self) -> None:
         """各コンポーネントの初期化"""
         # LLMの初期化
-        llm_type = self.config["llm_type"]
-        llm_config = self.config["llm_config"]
-        self.llm = LLMFactory.create(llm_type, llm_config)
+        llm_type = self.config.llm_type
+        llm_config = self.config.llm_config
+        self.llm = LLMFactory.create(
+            llm_type,
+            llm_config,
+            concurrency=self.config.generation.max_concurrency,
+        )
         logger.info(f"LLM '{llm_type}' を初期化しました")
 
         # パーサーを先に初期化
@@ -70,7 +56,9 @@ class NovelGenerator:
         
         # 各マネージャーの初期化（パーサーを渡す）
         self.log_manager = LogManager(self.output_dir, self.parser)
-        self.prompt_manager = PromptManager()
+        self.prompt_manager = PromptManager(
+            context_window=self.config.generation.context_window
+        )
 
         # StoryManagerの初期化
         self.story_manager = StoryManager(
@@ -81,12 +69,12 @@ class NovelGenerator:
             parser=self.parser,
         )
 
-    def generate_story(
+    async def agenerate_story(
         self,
         max_sections: int = 20,
         total_length: str = "中編（3万字程度）",
     ) -> str:
-        """物語を生成
+        """物語を非同期に生成
 
         Args:
             max_sections (int): 最大セクション数. デフォルトは20.
@@ -100,7 +88,9 @@ class NovelGenerator:
         """
         try:
             logger.info("=== 物語生成を開始 ===")
-            story = self.story_manager.generate_full_story(max_sections, total_length)
+            story = await self.story_manager.agenerate_full_story(
+                max_sections, total_length
+            )
             logger.info("=== 物語生成が完了 ===")
             return story
 
@@ -108,6 +98,28 @@ class NovelGenerator:
             logger.error(f"物語生成中にエラー: {str(e)}")
             raise
 
+        finally:
+            self.log_manager.close()
+
+    def generate_story(
+        self,
+        max_sections: int = 20,
+        total_length: str = "中編（3万字程度）",
+    ) -> str:
+        """物語を生成（agenerate_storyの同期ラッパー）
+
+        Args:
+            max_sections (int): 最大セクション数. デフォルトは20.
+            total_length (str): 想定される物語の長さ.
+
+        Returns:
+            str: 生成された物語
+
+        Raises:
+            Exception: 物語生成に失敗した場合
+        """
+        return asyncio.run(self.agenerate_story(max_sections, total_length))
+
     def get_current_length(self) -> int:
         """現在の文字数を取得
 
@@ -2,7 +2,7 @@
 
 import logging
 import re
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List, Optional, Tuple
 
 from ..models.data_models import (
     Character,
@@ -15,6 +15,41 @@ from ..models.data_models import (
 
 logger = logging.getLogger(__name__)
 
+# 繰り返し使うブロック抽出用パターン
+_CHARACTER_PATTERN = re.compile(r"<character>(.*?)</character>", re.DOTALL)
+_POINT_PATTERN = re.compile(r"<point>(.*?)</point>", re.DOTALL)
+_ELEMENT_PATTERN = re.compile(r"<element>(.*?)</element>", re.DOTALL)
+_SECTION_PATTERN = re.compile(r"<section>(.*?)</section>", re.DOTALL)
+
+# 要素が所定の順序で並んだブロックを1回の走査で解析するパターン
+_CHARACTER_FIELDS_PATTERN = re.compile(
+    r"<character>\s*<name>(.*?)</name>\s*<role>(.*?)</role>"
+    r"\s*<personality>(.*?)</personality>\s*</character>",
+    re.DOTALL,
+)
+_SECTION_FIELDS_PATTERN = re.compile(
+    r"<section>\s*<content>(.*?)</content>\s*<goals>(.*?)</goals>\s*</section>",
+    re.DOTALL,
+)
+
+# ストリーミング解析で閉じタグを監視するタグ（出現順）
+_STREAM_TAGS = ("thinking", "content", "progress", "next_preview", "section")
+_MAX_CLOSE_TAG_LENGTH = max(len(f"</{tag}>") for tag in _STREAM_TAGS)
+
+# 応答ごとのタグを1回の走査でまとめて抽出するパターン
+_SECTION_DATA_TAGS_PATTERN = re.compile(
+    r"<(thinking|section|content|progress|percentage|achieved_points"
+    r"|remaining_points|next_preview)>(.*?)</\1>",
+    re.DOTALL,
+)
+_BASE_SETTINGS_TAGS_PATTERN = re.compile(
+    r"<(thinking|story_base|themes|world_setting|tone)>(.*?)</\1>", re.DOTALL
+)
+_STORY_PLAN_TAGS_PATTERN = re.compile(
+    r"<(thinking|story_plan|outline|major_points|sections|foreshadowing)>(.*?)</\1>",
+    re.DOTALL,
+)
+
 
 class ResponseParser:
     """LLMの応答を解析するクラス"""
@@ -25,32 +60,54 @@ class ResponseParser:
             logger.debug(f"無効な入力テキスト: {text}")
             return ""
 
-        # タグを含むかどうかの簡易チェック
-        if f"<{tag}>" not in text or f"</{tag}>" not in text:
+        return self._extract_tag_content_unchecked(text, tag)
+
+    def _extract_tag_content_unchecked(self, text: str, tag: str) -> str:
+        """XMLタグの内容を抽出（入力が文字列であることは検証しない）
+
+        検証済みのテキストやその部分文字列に対する内部向けの抽出処理。
+        """
+        # 開始タグ・終了タグをstr.findで探して切り出す
+        # （正規表現 <tag>\s*(.*?)\s*</tag> の最初の一致と同じ結果になる）
+        open_tag = f"<{tag}>"
+        close_tag = f"</{tag}>"
+
+        start = text.find(open_tag)
+        if start < 0:
             logger.debug(f"タグ {tag} が見つかりません")
             return ""
+        start += len(open_tag)
 
-        try:
-            # デバッグ用に検索パターンとテキストの一部を出力
-            pattern = rf"<{tag}>\s*(.*?)\s*</{tag}>"
-            logger.debug(f"検索パターン: {pattern}")
-            logger.debug(f"テキストの一部: {text[:200]}...")  # 最初の200文字のみ
+        end = text.find(close_tag, start)
+        if end < 0:
+            logger.debug(f"タグ {tag} の内容を抽出できません")
+            logger.debug(
+                f"テキスト内のタグ位置: 開始={start - len(open_tag)}, 終了={text.find(close_tag)}"
+            )
+            return ""
 
-            matches = list(re.finditer(pattern, text, re.DOTALL))
+        return text[start:end].strip()
 
-            if not matches:
-                logger.debug(f"タグ {tag} の内容を抽出できません")
-                logger.debug(
-                    f"テキスト内のタグ位置: 開始={text.find(f'<{tag}>')}, 終了={text.find(f'</{tag}>')}"
-                )
-                return ""
+    def _extract_tags(self, text: str, pattern: re.Pattern) -> Dict[str, str]:
+        """パターンに含まれるタグの内容を1回の走査でまとめて抽出
 
-            content = matches[0].group(1).strip()
-            return content
+        入れ子のタグは外側のタグに含まれるため、内側は外側の内容に対して
+        改めて走査する。同じタグが複数ある場合は最初の内容を採用する。
 
-        except Exception as e:
-            logger.error(f"タグ {tag} の抽出中にエラー: {str(e)}")
-            return ""
+        Args:
+            text (str): 対象テキスト
+            pattern (re.Pattern): タグ名と内容をグループに持つパターン
+
+        Returns:
+            Dict[str, str]: タグ名と内容の辞書
+        """
+        tags = {}
+        if not text:
+            return tags
+
+        for match in pattern.finditer(text):
+            tags.setdefault(match.group(1), match.group(2).strip())
+        return tags
 
     def extract_content_tag(self, text: str) -> str:
         """コンテントタグの内容を特別な方法で抽出
@@ -65,35 +122,24 @@ class ResponseParser:
             return ""
 
         start_tag = "<content>"
-        if start_tag not in text:
+        start_pos = text.find(start_tag)
+        if start_pos == -1:
             # DEBUGレベルに変更（或いはログ自体を削除）
             logger.debug("content タグが見つかりません")
             return text  # タグがない場合はテキスト全体を返す
 
-        # 開始位置を見つける
-        start_pos = text.find(start_tag) + len(start_tag)
+        # 開始位置以降をオフセット指定で検索（部分文字列は作らない）
+        start_pos += len(start_tag)
 
-        # 以降のテキストを検索
-        remaining_text = text[start_pos:]
+        # 明示的な終了タグを優先し、なければ次の '<'（他のタグの開始）まで
+        end_pos = text.find("</content>", start_pos)
+        if end_pos == -1:
+            end_pos = text.find("<", start_pos)
+            if end_pos == -1:
+                # どちらも見つからない場合は残りすべて
+                end_pos = len(text)
 
-        # 次の '<' を探す（他のタグの開始）
-        next_tag_pos = remaining_text.find("<")
-
-        # 明示的な終了タグを探す
-        end_tag_pos = remaining_text.find("</content>")
-
-        # 終了位置の決定
-        if end_tag_pos != -1:
-            # 明示的な終了タグが見つかった場合
-            content = remaining_text[:end_tag_pos]
-        elif next_tag_pos != -1:
-            # 次のタグが見つかった場合
-            content = remaining_text[:next_tag_pos]
-        else:
-            # どちらも見つからない場合は残りすべて
-            content = remaining_text
-
-        return content.strip()
+        return text[start_pos:end_pos].strip()
 
     def extract_percentage(self, text: str) -> float:
         """進行度を表す数値を抽出
@@ -104,11 +150,24 @@ class ResponseParser:
         Returns:
             float: 抽出された進行度。抽出失敗時は推定値を返す
         """
-        # まず、数値のみを抽出してみる
-        number_match = re.search(r"(\d+(?:\.\d+)?)", text)
-        if number_match:
+        # まず、最初に現れる数値（小数を含む）を抽出してみる
+        length = len(text)
+        start = 0
+        while start < length and not text[start].isdecimal():
+            start += 1
+
+        if start < length:
+            end = start + 1
+            while end < length and text[end].isdecimal():
+                end += 1
+            # 小数部は「.」の直後に数字が続く場合のみ含める
+            if end + 1 < length and text[end] == "." and text[end + 1].isdecimal():
+                end += 2
+                while end < length and text[end].isdecimal():
+                    end += 1
+
             try:
-                value = float(number_match.group(1))
+                value = float(text[start:end])
                 if 0 <= value <= 100:
                     return value
             except ValueError:
@@ -146,9 +205,13 @@ class ResponseParser:
                 logger.error("無効な応答テキスト")
                 raise ValueError("無効な応答テキスト")
 
+            response_tags = self._extract_tags(
+                response_text, _SECTION_DATA_TAGS_PATTERN
+            )
+
             # thinkingの抽出と検証
             if not thinking:
-                thinking = self.extract_tag_content(response_text, "thinking")
+                thinking = response_tags.get("thinking", "")
                 if thinking:
                     logger.info("応答テキストから思考プロセスを抽出しました")
 
@@ -157,15 +220,18 @@ class ResponseParser:
                 thinking = "物語の展開を考慮しています"  # デフォルト値
 
             # セクションの抽出
-            section = self.extract_tag_content(response_text, "section")
-            if not section:
+            section = response_tags.get("section", "")
+            if section:
+                section_tags = self._extract_tags(section, _SECTION_DATA_TAGS_PATTERN)
+            else:
                 logger.warning(
                     "セクションタグが見つかりません。応答全体をコンテンツとして使用します"
                 )
                 section = response_text
+                section_tags = response_tags
 
             # コンテンツの抽出（ここを修正）
-            content = self.extract_tag_content(section, "content")
+            content = section_tags.get("content", "")
             if not content:
                 logger.warning("コンテンツが抽出できません。セクション全体を使用します")
                 content = section
@@ -176,26 +242,22 @@ class ResponseParser:
                 logger.warning("コンテンツが極端に短いためデフォルト値を使用")
 
             # プログレス情報の抽出と解析
-            progress_text = self.extract_tag_content(section, "progress")
-            percentage = self.extract_percentage(
-                self.extract_tag_content(progress_text, "percentage")
+            progress_tags = self._extract_tags(
+                section_tags.get("progress", ""), _SECTION_DATA_TAGS_PATTERN
             )
+            percentage = self.extract_percentage(progress_tags.get("percentage", ""))
 
             # 達成点と残り要素の抽出
             achieved_points = [
-                point.strip()
-                for point in self.extract_tag_content(
-                    progress_text, "achieved_points"
-                ).split("\n")
-                if point.strip()
+                point
+                for line in progress_tags.get("achieved_points", "").splitlines()
+                if (point := line.strip())
             ] or ["基本的な展開を達成"]
 
             remaining_points = [
-                point.strip()
-                for point in self.extract_tag_content(
-                    progress_text, "remaining_points"
-                ).split("\n")
-                if point.strip()
+                point
+                for line in progress_tags.get("remaining_points", "").splitlines()
+                if (point := line.strip())
             ] or ["さらなる展開"]
 
             # プログレスオブジェクトの作成
@@ -206,9 +268,7 @@ class ResponseParser:
             )
 
             # 次のプレビューの抽出
-            next_preview = (
-                self.extract_tag_content(section, "next_preview") or default_preview
-            )
+            next_preview = section_tags.get("next_preview") or default_preview
 
             # 最終的なSectionDataオブジェクトの作成
             return SectionData(
@@ -232,6 +292,33 @@ class ResponseParser:
                 thinking=default_thinking,
             )
 
+    async def parse_section_data_stream(
+        self, chunks: AsyncIterator[str]
+    ) -> AsyncIterator[Tuple[str, str]]:
+        """ストリーミング応答を逐次解析
+
+        チャンクを受信するたびに監視対象タグの閉じタグを探し、
+        閉じたタグから順に内容を返す。
+
+        Args:
+            chunks (AsyncIterator[str]): LLMからの応答チャンク
+
+        Yields:
+            Tuple[str, str]: (タグ名, タグの内容)
+        """
+        buffer = ""
+        pending = list(_STREAM_TAGS)
+
+        async for chunk in chunks:
+            # チャンク境界をまたぐ閉じタグも検出できるよう少し手前から探す
+            search_start = max(0, len(buffer) - _MAX_CLOSE_TAG_LENGTH)
+            buffer += chunk
+
+            for tag in list(pending):
+                if buffer.find(f"</{tag}>", search_start) >= 0:
+                    pending.remove(tag)
+                    yield tag, self._extract_tag_content_unchecked(buffer, tag)
+
     def parse_characters(self, text: str) -> List[Character]:
         """キャラクター情報のパース
 
@@ -241,14 +328,24 @@ class ResponseParser:
         Returns:
             List[Character]: キャラクター情報のリスト
         """
+        # すべてのブロックが所定の形式であれば1回の走査で解析する
+        matches = _CHARACTER_FIELDS_PATTERN.findall(text)
+        if len(matches) == text.count("<character>"):
+            return [
+                Character(
+                    name=name.strip(), role=role.strip(), personality=personality.strip()
+                )
+                for name, role, personality in matches
+            ]
+
         characters = []
-        character_blocks = re.findall(r"<character>(.*?)</character>", text, re.DOTALL)
+        character_blocks = _CHARACTER_PATTERN.findall(text)
 
         for block in character_blocks:
             character = Character(
-                name=self.extract_tag_content(block, "name"),
-                role=self.extract_tag_content(block, "role"),
-                personality=self.extract_tag_content(block, "personality"),
+                name=self._extract_tag_content_unchecked(block, "name"),
+                role=self._extract_tag_content_unchecked(block, "role"),
+                personality=self._extract_tag_content_unchecked(block, "personality"),
             )
             characters.append(character)
 
@@ -263,13 +360,15 @@ class ResponseParser:
         Returns:
             StoryBaseSettings: 解析された基本設定
         """
-        story_base = self.extract_tag_content(response_text, "story_base")
-        thinking = self.extract_tag_content(response_text, "thinking")
+        response_tags = self._extract_tags(response_text, _BASE_SETTINGS_TAGS_PATTERN)
+        story_base = response_tags.get("story_base", "")
+        thinking = response_tags.get("thinking", "")
 
-        themes = self.extract_tag_content(story_base, "themes").split("\n")
+        base_tags = self._extract_tags(story_base, _BASE_SETTINGS_TAGS_PATTERN)
+        themes = base_tags.get("themes", "").split("\n")
         characters = self.parse_characters(story_base)
-        world_setting = self.extract_tag_content(story_base, "world_setting")
-        tone = self.extract_tag_content(story_base, "tone")
+        world_setting = base_tags.get("world_setting", "")
+        tone = base_tags.get("tone", "")
 
         return StoryBaseSettings(
             themes=themes,
@@ -288,14 +387,18 @@ class ResponseParser:
         Returns:
             StoryPlan: 解析された展開計画
         """
-        story_plan = self.extract_tag_content(response_text, "story_plan")
-        thinking = self.extract_tag_content(response_text, "thinking")
+        response_tags = self._extract_tags(response_text, _STORY_PLAN_TAGS_PATTERN)
+        story_plan = response_tags.get("story_plan", "")
+        thinking = response_tags.get("thinking", "")
 
         # 各要素の抽出
-        outline = self.extract_tag_content(story_plan, "outline")
-        major_points = self._parse_major_points(story_plan)
-        sections = self._parse_planned_sections(story_plan)
-        foreshadowing = self._parse_foreshadowing(story_plan)
+        plan_tags = self._extract_tags(story_plan, _STORY_PLAN_TAGS_PATTERN)
+        outline = plan_tags.get("outline", "")
+        major_points = self._parse_major_points(plan_tags.get("major_points", ""))
+        sections = self._parse_planned_sections(
+            plan_tags.get("sections") or story_plan
+        )
+        foreshadowing = self._parse_foreshadowing(plan_tags.get("foreshadowing", ""))
 
         return StoryPlan(
             outline=outline,
@@ -305,17 +408,16 @@ class ResponseParser:
             thinking_process=thinking,
         )
 
-    def _parse_major_points(self, text: str) -> List[str]:
+    def _parse_major_points(self, major_points_text: str) -> List[str]:
         """重要な展開点のパース
 
         Args:
-            text (str): 展開点情報を含むテキスト
+            major_points_text (str): major_pointsタグの内容
 
         Returns:
             List[str]: 展開点のリスト
         """
-        major_points_text = self.extract_tag_content(text, "major_points")
-        points = re.findall(r"<point>(.*?)</point>", major_points_text, re.DOTALL)
+        points = _POINT_PATTERN.findall(major_points_text)
         return [point.strip() for point in points]
 
     def _parse_planned_sections(self, text: str) -> List[StorySection]:
@@ -327,18 +429,45 @@ class ResponseParser:
         Returns:
             List[StorySection]: セクション情報のリスト
         """
+        # すべてのブロックが所定の形式であれば1回の走査で解析する
+        matches = _SECTION_FIELDS_PATTERN.findall(text)
+        if len(matches) == text.count("<section>"):
+            return [
+                StorySection(content=content.strip(), goals=goals.strip())
+                for content, goals in matches
+            ]
+
         sections = []
-        section_blocks = re.findall(r"<section>(.*?)</section>", text, re.DOTALL)
+        section_blocks = _SECTION_PATTERN.findall(text)
 
         for block in section_blocks:
             section = StorySection(
-                content=self.extract_tag_content(block, "content"),
-                goals=self.extract_tag_content(block, "goals"),
+                content=self._extract_tag_content_unchecked(block, "content"),
+                goals=self._extract_tag_content_unchecked(block, "goals"),
             )
             sections.append(section)
 
         return sections
 
+    def parse_plan_review_if_present(
+        self, response_text: str
+    ) -> Optional[Dict[str, str]]:
+        """応答にplan_reviewタグが含まれる場合のみ計画見直しの結果をパース
+
+        計画見直しとセクション生成をまとめて行った応答に使用する。
+
+        Args:
+            response_text (str): LLMからの応答テキスト
+
+        Returns:
+            Optional[Dict[str, str]]: 解析された計画見直し結果. plan_reviewタグが
+                ない場合はNone
+        """
+        if not self.extract_tag_content(response_text, "plan_review"):
+            logger.warning("応答にplan_reviewタグが含まれていません")
+            return None
+        return self.parse_plan_review(response_text)
+
     def parse_plan_review(self, response_text: str) -> Dict[str, str]:
         """計画見直しの結果をパース
 
@@ -391,17 +520,14 @@ class ResponseParser:
                 "thinking_process": "エラーにより解析不可",
             }
 
-    def _parse_foreshadowing(self, text: str) -> List[str]:
+    def _parse_foreshadowing(self, foreshadowing_text: str) -> List[str]:
         """伏線要素のパース
 
         Args:
-            text (str): 伏線情報を含むテキスト
+            foreshadowing_text (str): foreshadowingタグの内容
 
         Returns:
             List[str]: 伏線要素のリスト
         """
-        foreshadowing_text = self.extract_tag_content(text, "foreshadowing")
-        elements = re.findall(
-            r"<element>(.*?)</element>", foreshadowing_text, re.DOTALL
-        )
+        elements = _ELEMENT_PATTERN.findall(foreshadowing_text)
         return [element.strip() for element in elements]
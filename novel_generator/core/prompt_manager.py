@@ -1,18 +1,26 @@
 """プロンプト管理を行うメインクラスを提供するモジュール"""
 
+import functools
 import json
 import logging
-from dataclasses import asdict
 from datetime import datetime
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional, Tuple
 
-from ..models.data_models import StoryBaseSettings, StoryContext
+from ..models.data_models import StoryBaseSettings, StoryContext, StorySection
 from .prompts.exceptions import (
     RequiredParameterError,
     TemplateFormatError,
     TemplateNotFoundError,
 )
-from .prompts.templates import TEMPLATES
+from .prompts.templates import (
+    CompiledTemplate,
+    bind_compiled,
+    compile_template,
+    get_compiled_template,
+    get_template,
+    render_compiled,
+    split_compiled,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,9 +28,76 @@ logger = logging.getLogger(__name__)
 class PromptManager:
     """プロンプト管理クラス"""
 
-    def __init__(self):
-        """PromptManagerの初期化"""
-        self.templates = TEMPLATES
+    def __init__(self, context_window: int = 0):
+        """PromptManagerの初期化
+
+        Args:
+            context_window (int, optional): これまでの内容として本文をそのまま
+                送る直近のセクション数. それ以前はあらすじで送る. 0の場合は全文を送る.
+        """
+        self.context_window = context_window
+        # 使用したテンプレートと追加・更新したテンプレート
+        self.templates: Dict[str, str] = {}
+        # テンプレート名ごとの書式設定関数（コンパイル済みテンプレートの描画関数）
+        self._template_formatters: Dict[str, Callable[[Dict[str, Any]], str]] = {}
+        # 分解できたテンプレートのコンパイル結果（プレフィックス分割に使用）
+        self._compiled_templates: Dict[str, Optional[CompiledTemplate]] = {}
+        # セクション生成用の描画関数と、束縛したパラメータ
+        self._bound_section_prompt: Optional[
+            Callable[[str, int, str], Tuple[str, str]]
+        ] = None
+        self._bound_section_key: Optional[Tuple[str, str, str, str]] = None
+
+    def _get_template(self, template_name: str) -> str:
+        """テンプレートの取得（初回アクセス時に読み込んでキャッシュ）
+
+        Args:
+            template_name (str): テンプレート名
+
+        Returns:
+            str: テンプレート文字列
+
+        Raises:
+            TemplateNotFoundError: テンプレートが見つからない場合
+        """
+        template = self.templates.get(template_name)
+        if template is None:
+            template = get_template(template_name)
+            if template is None:
+                raise TemplateNotFoundError(template_name)
+            self._set_template(
+                template_name, template, get_compiled_template(template_name)
+            )
+        return template
+
+    def _set_template(
+        self,
+        template_name: str,
+        template: str,
+        compiled: Optional[CompiledTemplate] = None,
+    ) -> None:
+        """テンプレートと書式設定関数の登録
+
+        単純な {name} のみのテンプレートは分解済みの断片を連結して描画し、
+        書式指定などを含むテンプレートはstr.format_mapで描画する。
+        """
+        self.templates[template_name] = template
+        if template_name == "section_generation":
+            self._bound_section_prompt = None
+        if compiled is None:
+            compiled = compile_template(template)
+        self._compiled_templates[template_name] = compiled
+        self._template_formatters[template_name] = (
+            functools.partial(render_compiled, compiled)
+            if compiled is not None
+            else template.format_map
+        )
+
+    def _has_template(self, template_name: str) -> bool:
+        """テンプレートが存在するかを確認"""
+        return (
+            template_name in self.templates or get_template(template_name) is not None
+        )
 
     def _validate_required_params(
         self, template_name: str, params: Dict[str, Any], required_params: list
@@ -41,14 +116,11 @@ class PromptManager:
             if param not in params or params[param] is None:
                 raise RequiredParameterError(param, template_name)
 
-    def _format_template(
-        self, template_name: str, template: str, params: Dict[str, Any]
-    ) -> str:
+    def _format_template(self, template_name: str, params: Dict[str, Any]) -> str:
         """テンプレートの書式設定
 
         Args:
             template_name (str): テンプレート名
-            template (str): テンプレート文字列
             params (Dict[str, Any]): パラメータ辞書
 
         Returns:
@@ -58,7 +130,7 @@ class PromptManager:
             TemplateFormatError: テンプレートの書式設定に失敗した場合
         """
         try:
-            return template.format(**params)
+            return self._template_formatters[template_name](params)
         except Exception as e:
             raise TemplateFormatError(template_name, e)
 
@@ -78,8 +150,7 @@ class PromptManager:
             TemplateFormatError: テンプレートの書式設定に失敗した場合
         """
         template_name = "base_settings"
-        if template_name not in self.templates:
-            raise TemplateNotFoundError(template_name)
+        self._get_template(template_name)
 
         params = {
             "story_setting": story_setting,
@@ -90,9 +161,7 @@ class PromptManager:
             template_name, params, ["story_setting", "total_length"]
         )
 
-        return self._format_template(
-            template_name, self.templates[template_name], params
-        )
+        return self._format_template(template_name, params)
 
     def get_story_plan_prompt(
         self,
@@ -114,11 +183,10 @@ class PromptManager:
             TemplateFormatError: テンプレートの書式設定に失敗した場合
         """
         template_name = "story_plan"
-        if template_name not in self.templates:
-            raise TemplateNotFoundError(template_name)
+        self._get_template(template_name)
 
         # 基本設定をJSON形式に変換
-        base_settings_dict = asdict(base_settings)
+        base_settings_dict = base_settings.to_dict()
         base_settings_json = json.dumps(
             base_settings_dict, ensure_ascii=False, indent=2
         )
@@ -132,68 +200,298 @@ class PromptManager:
             template_name, params, ["story_setting", "base_settings"]
         )
 
-        return self._format_template(
-            template_name, self.templates[template_name], params
-        )
+        return self._format_template(template_name, params)
 
     def get_section_generation_prompt(
-        self, story_context: StoryContext, section_count: int
+        self,
+        story_context: StoryContext,
+        section_count: int,
+        planned_section: Optional[StorySection] = None,
     ) -> str:
-        """セクション生成用プロンプトの取得（計画調整を反映）"""
-        template_name = "section_generation"
-        if template_name not in self.templates:
-            raise TemplateNotFoundError(template_name)
+        """セクション生成用プロンプトの取得（計画調整を反映）
 
-        # 基本設定をJSON形式に変換
-        base_settings_json = json.dumps(
-            asdict(story_context.base_settings), ensure_ascii=False, indent=2
+        Args:
+            story_context (StoryContext): 物語のコンテキスト
+            section_count (int): 現在のセクション番号
+            planned_section (Optional[StorySection]): 並列下書き時に担当する
+                計画セクション. 指定時はこれまでの内容の代わりに担当範囲を伝える.
+
+        Returns:
+            str: 生成用プロンプト
+        """
+        prefix, suffix = self.get_section_generation_prompt_parts(
+            story_context, section_count, planned_section
         )
+        return prefix + suffix
 
-        # 最新の計画状態を取得（調整履歴を含む）
-        current_plan = story_context.story_plan.get_current_plan_state()
-        story_plan_json = json.dumps(current_plan, ensure_ascii=False, indent=2)
+    def get_section_generation_prompt_parts(
+        self,
+        story_context: StoryContext,
+        section_count: int,
+        planned_section: Optional[StorySection] = None,
+    ) -> Tuple[str, str]:
+        """セクション生成用プロンプトを不変部分と可変部分に分けて取得
+
+        展開計画までの前半はセクションをまたいで共通のため、LLM側の
+        コンテキストキャッシュに登録して後半だけを送信できる。
+        前半と後半を連結したものはget_section_generation_promptと一致する。
+
+        Args:
+            story_context (StoryContext): 物語のコンテキスト
+            section_count (int): 現在のセクション番号
+            planned_section (Optional[StorySection]): 並列下書き時に担当する
+                計画セクション
+
+        Returns:
+            Tuple[str, str]: 前半（プレフィックス）と後半. テンプレートを
+                分割できない場合、前半は空文字列になる
+        """
+        bound_prompt = self._get_bound_section_prompt(story_context)
 
         # これまでの内容を取得
-        current_content = "\n\n".join(
-            [section.content for section in story_context.sections]
+        current_content = self.build_context(story_context)
+
+        # 並列下書きでは担当する計画セクションを明示する
+        section_focus = ""
+        if planned_section is not None:
+            current_content = (
+                "他のセクションと並行して執筆中です。"
+                "展開計画の担当セクションに沿って書いてください。"
+            )
+            section_focus = f"""
+今回執筆するセクション（セクション{section_count}）：
+- 内容: {planned_section.content}
+- 目標: {planned_section.get_current_goals()}
+"""
+
+        return bound_prompt(
+            current_content if current_content else "ないので最初の導入を書きましょう。",
+            story_context.current_length,
+            section_focus,
+        )
+
+    def build_context(self, story_context: StoryContext) -> str:
+        """プロンプトに含めるこれまでの内容を構築
+
+        あらすじがある場合は、あらすじとそれ以降のセクションの本文を返す。
+
+        Args:
+            story_context (StoryContext): 物語のコンテキスト
+
+        Returns:
+            str: これまでの内容
+        """
+        if self.context_window <= 0 or not story_context.content_digest:
+            return story_context.get_joined_content()
+
+        recent_sections = story_context.sections[story_context.digest_section_count :]
+        return (
+            f"これまでのあらすじ：\n{story_context.content_digest}\n\n"
+            "直近のセクション：\n"
+            + "\n\n".join(section.content for section in recent_sections)
+        )
+
+    def get_content_digest_prompt(
+        self, story_context: StoryContext, section_count: int
+    ) -> str:
+        """あらすじ更新用プロンプトの取得
+
+        Args:
+            story_context (StoryContext): 物語のコンテキスト
+            section_count (int): 新しいあらすじに含めるセクション数
+
+        Returns:
+            str: 生成用プロンプト
+        """
+        template_name = "content_digest"
+        self._get_template(template_name)
+
+        new_sections = story_context.sections[
+            story_context.digest_section_count : section_count
+        ]
+        params = {
+            "story_setting": story_context.story_setting,
+            "previous_digest": story_context.content_digest or "（まだありません）",
+            "new_content": "\n\n".join(section.content for section in new_sections),
+        }
+
+        self._validate_required_params(
+            template_name, params, ["previous_digest", "new_content"]
         )
 
-        # 現在の文字数を計算
-        current_length = sum(len(section.content) for section in story_context.sections)
+        return self._format_template(template_name, params)
 
-        # 最新の計画調整を取得
-        latest_adjustment = story_context.story_plan.get_latest_adjustment()
-        adjustment_info = ""
-        if latest_adjustment:
-            adjustment_info = f"""
+    def _get_bound_section_prompt(
+        self, story_context: StoryContext
+    ) -> Callable[[str, int, str], Tuple[str, str]]:
+        """コンテキストの不変部分を束縛した描画関数を取得
+
+        基本設定・展開計画などが変わるまでは同じ関数を使い回す。
+        """
+        key = (
+            story_context.story_setting,
+            story_context.base_settings_json,
+            story_context.story_plan_json,
+            story_context.total_length,
+        )
+        if self._bound_section_prompt is None or self._bound_section_key != key:
+            # 最新の計画調整を取得
+            latest_adjustment = story_context.story_plan.get_latest_adjustment()
+            adjustment_info = ""
+            if latest_adjustment:
+                adjustment_info = f"""
     直近の計画調整:
     - 分析: {latest_adjustment.analysis}
     - 調整内容: {latest_adjustment.adjustments}
     - 今後の展開方針: {latest_adjustment.future_plans}
     """
+            self._bound_section_prompt = self.bind(*key, plan_adjustments=adjustment_info)
+            self._bound_section_key = key
+        return self._bound_section_prompt
 
-        params = {
-            "base_settings": base_settings_json,
-            "story_plan": story_plan_json,
-            "current_content": current_content
-            if current_content
-            else "ないので最初の導入を書きましょう。",
-            "current_length": current_length,
-            "total_length": story_context.total_length,
-            "plan_adjustments": adjustment_info,
-            "story_setting": story_context.story_setting,
-        }
+    def bind(
+        self,
+        story_setting: str,
+        base_settings: str,
+        story_plan: str,
+        total_length: str,
+        plan_adjustments: str = "",
+    ) -> Callable[[str, int, str], Tuple[str, str]]:
+        """セクション生成用テンプレートに不変のパラメータを埋め込んだ描画関数を作成
+
+        前半（プレフィックス）は文字列として描画済みにし、後半は可変部分
+        （これまでの内容・現在の文字数・担当セクション）のみを埋め込む。
+
+        Args:
+            story_setting (str): 物語の設定
+            base_settings (str): 基本設定のJSON文字列
+            story_plan (str): 計画状態のJSON文字列
+            total_length (str): 想定される物語の長さ
+            plan_adjustments (str, optional): 直近の計画調整の説明
+
+        Returns:
+            Callable[[str, int, str], Tuple[str, str]]: これまでの内容、現在の
+                文字数、担当セクションの説明を受け取り、前半と後半を返す関数
+
+        Raises:
+            TemplateNotFoundError: テンプレートが見つからない場合
+            RequiredParameterError: 必須パラメータが不足している場合
+        """
+        template_name = "section_generation"
+        self._get_template(template_name)
 
+        static_params = {
+            "story_setting": story_setting,
+            "base_settings": base_settings,
+            "story_plan": story_plan,
+            "total_length": total_length,
+            "plan_adjustments": plan_adjustments,
+        }
         self._validate_required_params(
             template_name,
-            params,
+            static_params,
             ["base_settings", "story_plan", "total_length"],
         )
 
-        return self._format_template(
-            template_name, self.templates[template_name], params
+        compiled = self._compiled_templates.get(template_name)
+        if compiled is None:
+            # 分解できないテンプレートは毎回全体を書式設定する
+            def render_formatted(
+                current_content: str, current_length: int, section_focus: str = ""
+            ) -> Tuple[str, str]:
+                params = dict(
+                    static_params,
+                    current_content=current_content,
+                    current_length=current_length,
+                    section_focus=section_focus,
+                )
+                return "", self._format_template(template_name, params)
+
+            return render_formatted
+
+        prefix_tokens, suffix_tokens = split_compiled(compiled, "story_plan")
+        prefix_tokens = bind_compiled(prefix_tokens, static_params)
+        if any(name is not None for _, name in prefix_tokens):
+            # 前半に可変部分が含まれる場合は全体を後半として扱う
+            prefix = ""
+            suffix_tokens = bind_compiled(compiled, static_params)
+        else:
+            prefix = render_compiled(prefix_tokens, static_params)
+            suffix_tokens = bind_compiled(suffix_tokens, static_params)
+
+        def render(
+            current_content: str, current_length: int, section_focus: str = ""
+        ) -> Tuple[str, str]:
+            params = {
+                "current_content": current_content,
+                "current_length": current_length,
+                "section_focus": section_focus,
+            }
+            try:
+                return prefix, render_compiled(suffix_tokens, params)
+            except Exception as e:
+                raise TemplateFormatError(template_name, e)
+
+        return render
+
+    def get_combined_review_and_section_prompt(
+        self, story_context: StoryContext, section_count: int
+    ) -> str:
+        """計画見直しとセクション生成をまとめて行うプロンプトの取得
+
+        Args:
+            story_context (StoryContext): 物語のコンテキスト
+            section_count (int): 現在のセクション番号
+
+        Returns:
+            str: 生成用プロンプト
+        """
+        prefix, suffix = self.get_combined_review_and_section_prompt_parts(
+            story_context, section_count
+        )
+        return prefix + suffix
+
+    def get_combined_review_and_section_prompt_parts(
+        self, story_context: StoryContext, section_count: int
+    ) -> Tuple[str, str]:
+        """計画見直しとセクション生成をまとめて行うプロンプトを前半と後半に分けて取得
+
+        セクション生成用プロンプトの後半に計画見直しの指示を追加する。
+        前半はセクション生成用プロンプトと共通のため、同じキャッシュを使える。
+
+        Args:
+            story_context (StoryContext): 物語のコンテキスト
+            section_count (int): 現在のセクション番号
+
+        Returns:
+            Tuple[str, str]: 前半（プレフィックス）と後半
+        """
+        prefix, suffix = self.get_section_generation_prompt_parts(
+            story_context, section_count
         )
 
+        template_name = "combined_plan_review"
+        self._get_template(template_name)
+
+        params = {
+            "section_count": section_count,
+            "length_info": self._get_length_info_json(story_context),
+        }
+
+        self._validate_required_params(
+            template_name, params, ["section_count", "length_info"]
+        )
+
+        return prefix, suffix + self._format_template(template_name, params)
+
+    def _get_length_info_json(self, story_context: StoryContext) -> str:
+        """文字数の状況をJSON形式で取得"""
+        length_info = {
+            "current_length": story_context.current_length,
+            "total_length_setting": story_context.total_length,
+        }
+        return json.dumps(length_info, ensure_ascii=False, indent=2)
+
     def get_plan_review_prompt(
         self, story_context: StoryContext, section_count: int
     ) -> str:
@@ -207,19 +505,13 @@ class PromptManager:
             str: 生成用プロンプト
         """
         template_name = "plan_review"
-        if template_name not in self.templates:
-            raise TemplateNotFoundError(template_name)
+        self._get_template(template_name)
 
         # 各要素をJSON形式に変換
-        base_settings_json = json.dumps(
-            asdict(story_context.base_settings),
-            ensure_ascii=False,
-            indent=2,
-            cls=DateTimeJSONEncoder,
-        )
+        base_settings_json = story_context.base_settings_json
 
         story_plan_json = json.dumps(
-            asdict(story_context.story_plan),
+            story_context.story_plan.to_dict(),
             ensure_ascii=False,
             indent=2,
             cls=DateTimeJSONEncoder,
@@ -228,15 +520,8 @@ class PromptManager:
         # 直近のセクションのサマリーを生成
         current_content = self._generate_content_summary(story_context.sections)
 
-        # 現在の文字数を計算
-        current_length = sum(len(section.content) for section in story_context.sections)
-
         # 文字数情報を詳細に構築
-        length_info = {
-            "current_length": current_length,
-            "total_length_setting": story_context.total_length,
-        }
-        length_info_json = json.dumps(length_info, ensure_ascii=False, indent=2)
+        length_info_json = self._get_length_info_json(story_context)
 
         params = {
             "base_settings": base_settings_json,
@@ -259,9 +544,7 @@ class PromptManager:
             ],
         )
 
-        return self._format_template(
-            template_name, self.templates[template_name], params
-        )
+        return self._format_template(template_name, params)
 
     def _generate_content_summary(self, sections: list) -> str:
         """セクションの内容サマリーを生成
@@ -294,10 +577,10 @@ class PromptManager:
         Raises:
             ValueError: 既存のテンプレート名が指定された場合
         """
-        if name in self.templates:
+        if self._has_template(name):
             raise ValueError(f"テンプレート '{name}' は既に存在します")
 
-        self.templates[name] = template
+        self._set_template(name, template)
         logger.info(f"新しいテンプレート '{name}' を追加しました")
 
     def update_template(self, name: str, template: str) -> None:
@@ -310,10 +593,10 @@ class PromptManager:
         Raises:
             TemplateNotFoundError: 指定されたテンプレートが存在しない場合
         """
-        if name not in self.templates:
+        if not self._has_template(name):
             raise TemplateNotFoundError(name)
 
-        self.templates[name] = template
+        self._set_template(name, template)
         logger.info(f"テンプレート '{name}' を更新しました")
 
 
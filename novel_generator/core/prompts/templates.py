@@ -1,5 +1,11 @@
 """プロンプトテンプレートを管理するモジュール"""
 
+import string
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+# コンパイル済みテンプレート: (固定文字列, None) または ("", 変数名) の並び
+CompiledTemplate = Tuple[Tuple[str, Optional[str]], ...]
+
 # 基本設定生成用テンプレート
 BASE_SETTINGS_TEMPLATE = """あなたは小説家です。以下の設定に基づいて、物語の基本設定を考えてください。
 
@@ -118,7 +124,7 @@ SECTION_GENERATION_TEMPLATE = """以下の情報に基づいて、物語の次
 
 想定の長さ：{total_length}
 現在の文字数：{current_length}文字
-
+{section_focus}
 <thinking>
 このセクションについて、以下の点を具体的に考察します：
 
@@ -204,10 +210,160 @@ PLAN_REVIEW_TEMPLATE = """現在の進行状況に基づいて、計画の見直
 <future_plans>[調整後の具体的な展開方針]</future_plans>
 </plan_review>"""
 
+# 計画見直しをセクション生成と同じリクエストで行う場合に、
+# セクション生成用プロンプトの末尾に追加するテンプレート
+COMBINED_PLAN_REVIEW_TEMPLATE = """
+
+あわせて、セクション{section_count}の執筆とともに計画の見直しを行ってください。
+<section>タグの後に、これまでの内容と文字数の状況を踏まえた見直し内容を<plan_review>タグ内に記述してください。
+見直しについての考察も<thinking>タグ内に含めてください。
+
+文字数の状況：
+{length_info}
+
+<plan_review>
+<analysis>[現状の詳細な分析]</analysis>
+<adjustments>[必要な調整事項の具体的な内容]</adjustments>
+<future_plans>[調整後の具体的な展開方針]</future_plans>
+</plan_review>"""
+
+# 古いセクションのあらすじ更新用テンプレート
+CONTENT_DIGEST_TEMPLATE = """以下は執筆中の物語のこれまでのあらすじと、その続きの本文です。
+両方を踏まえて、物語の冒頭から続きの本文の最後までのあらすじを作成してください。
+続きを執筆するために必要な登場人物の状況、出来事、伏線を漏らさず、簡潔にまとめてください。
+
+ユーザーからの依頼内容：
+{story_setting}
+
+これまでのあらすじ：
+{previous_digest}
+
+続きの本文：
+{new_content}
+
+<digest>
+[物語の冒頭からのあらすじ]
+</digest>"""
+
 # テンプレート辞書
-TEMPLATES = {
+TEMPLATES: Dict[str, str] = {
     "base_settings": BASE_SETTINGS_TEMPLATE,
     "story_plan": STORY_PLAN_TEMPLATE,
     "section_generation": SECTION_GENERATION_TEMPLATE,
     "plan_review": PLAN_REVIEW_TEMPLATE,
+    "combined_plan_review": COMBINED_PLAN_REVIEW_TEMPLATE,
+    "content_digest": CONTENT_DIGEST_TEMPLATE,
+}
+
+
+def get_template(name: str) -> Optional[str]:
+    """テンプレート名からテンプレート文字列を取得
+
+    Args:
+        name (str): テンプレート名
+
+    Returns:
+        Optional[str]: テンプレート文字列. 存在しない場合はNone
+    """
+    return TEMPLATES.get(name)
+
+
+def compile_template(template: str) -> Optional[CompiledTemplate]:
+    """テンプレートを固定文字列と変数名の並びに分解
+
+    Args:
+        template (str): str.format形式のテンプレート文字列
+
+    Returns:
+        Optional[CompiledTemplate]: 分解結果. 書式指定や属性参照など
+            単純な {name} 以外の置換フィールドを含む場合はNone
+    """
+    tokens = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(
+        template
+    ):
+        if literal:
+            tokens.append((literal, None))
+        if field_name is None:
+            continue
+        if not field_name.isidentifier() or format_spec or conversion:
+            return None
+        tokens.append(("", field_name))
+    return tuple(tokens)
+
+
+def render_compiled(tokens: CompiledTemplate, params: Mapping[str, Any]) -> str:
+    """コンパイル済みテンプレートにパラメータを埋め込む
+
+    Args:
+        tokens (CompiledTemplate): compile_templateの結果
+        params (Mapping[str, Any]): パラメータ辞書
+
+    Returns:
+        str: 埋め込み後の文字列
+
+    Raises:
+        KeyError: パラメータが不足している場合
+    """
+    return "".join(
+        literal if name is None else str(params[name]) for literal, name in tokens
+    )
+
+
+def bind_compiled(tokens: CompiledTemplate, params: Mapping[str, Any]) -> CompiledTemplate:
+    """指定したパラメータを埋め込み、残りの変数のみを持つテンプレートを返す
+
+    Args:
+        tokens (CompiledTemplate): compile_templateの結果
+        params (Mapping[str, Any]): 埋め込むパラメータ（一部でよい）
+
+    Returns:
+        CompiledTemplate: 隣接する固定文字列を連結したコンパイル済みテンプレート
+    """
+    bound = []
+    for literal, name in tokens:
+        if name is not None and name in params:
+            literal, name = str(params[name]), None
+        if name is None and bound and bound[-1][1] is None:
+            bound[-1] = (bound[-1][0] + literal, None)
+        else:
+            bound.append((literal, name))
+    return tuple(bound)
+
+
+def split_compiled(
+    tokens: CompiledTemplate, field_name: str
+) -> Tuple[CompiledTemplate, CompiledTemplate]:
+    """指定した変数の直後でコンパイル済みテンプレートを前後に分割
+
+    Args:
+        tokens (CompiledTemplate): compile_templateの結果
+        field_name (str): 分割位置とする変数名（最後の出現位置の直後で分割）
+
+    Returns:
+        Tuple[CompiledTemplate, CompiledTemplate]: 前半と後半. 変数が
+            存在しない場合は前半が空になる
+    """
+    for index in range(len(tokens) - 1, -1, -1):
+        if tokens[index][1] == field_name:
+            return tokens[: index + 1], tokens[index + 1 :]
+    return (), tokens
+
+
+# 組み込みテンプレートはインポート時に一度だけ分解しておく
+_COMPILED_TEMPLATES: Dict[str, CompiledTemplate] = {
+    key: compile_template(template) for key, template in TEMPLATES.items()
 }
+
+
+def get_compiled_template(name: str) -> Optional[CompiledTemplate]:
+    """テンプレート名からコンパイル済みテンプレートを取得
+
+    Args:
+        name (str): テンプレート名
+
+    Returns:
+        Optional[CompiledTemplate]: コンパイル済みテンプレート. 存在しない場合はNone
+    """
+    return _COMPILED_TEMPLATES.get(name)
+
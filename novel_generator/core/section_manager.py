@@ -1,7 +1,15 @@
+from contextlib import aclosing
 from datetime import datetime
+from typing import Dict, Optional, Tuple
+import asyncio
 import logging
 
-from ..models.data_models import SectionData, StoryContext, PlanAdjustment
+from ..models.data_models import (
+    PlanAdjustment,
+    SectionData,
+    StoryContext,
+    StorySection,
+)
 from ..logging.log_manager import LogManager
 from .prompt_manager import PromptManager
 from .parser import ResponseParser
@@ -12,6 +20,9 @@ logger = logging.getLogger(__name__)
 class SectionManager:
     """セクション生成を管理するクラス"""
 
+    # セクション本文の最低文字数
+    MIN_CONTENT_LENGTH = 1000
+
     def __init__(
         self,
         llm: BaseLLM,
@@ -26,9 +37,116 @@ class SectionManager:
         self.parser = parser
         self.story_context = story_context
 
-    def generate_section(self, section_count: int, max_retries: int = 3) -> SectionData:
+        # セクションプロンプトの共通プレフィックスとそのキャッシュキー
+        self._cached_prefix: Optional[str] = None
+        self._cache_key: Optional[str] = None
+        self._cache_lock = asyncio.Lock()
+
+    async def aprepare_prompt_cache(self) -> None:
+        """現在の基本設定と展開計画からプロンプトのプレフィックスを登録"""
+        prefix, _ = self.prompt_manager.get_section_generation_prompt_parts(
+            self.story_context, len(self.story_context.sections) + 1
+        )
+        await self._aget_cache_key(prefix)
+
+    async def arelease_prompt_cache(self) -> None:
+        """登録したプレフィックスのキャッシュを削除"""
+        async with self._cache_lock:
+            if self._cache_key is not None:
+                await asyncio.to_thread(self.llm.delete_cache, self._cache_key)
+            self._cached_prefix = None
+            self._cache_key = None
+
+    async def _aget_cache_key(self, prefix: str) -> Optional[str]:
+        """プレフィックスのキャッシュキーを取得
+
+        計画見直しなどでプレフィックスが変わった場合はキャッシュを作り直す。
+
+        Args:
+            prefix (str): セクションプロンプトの共通プレフィックス
+
+        Returns:
+            Optional[str]: キャッシュキー. キャッシュを使えない場合はNone
+        """
+        if not prefix:
+            return None
+
+        async with self._cache_lock:
+            if prefix == self._cached_prefix:
+                return self._cache_key
+
+            if self._cache_key is not None:
+                await asyncio.to_thread(self.llm.delete_cache, self._cache_key)
+            self._cached_prefix = prefix
+            self._cache_key = await asyncio.to_thread(self.llm.create_cache, prefix)
+            return self._cache_key
+
+    async def _agenerate_section_response(
+        self,
+        prompt: str,
+        section_count: int,
+        request: str,
+        cache_key: Optional[str] = None,
+    ) -> str:
+        """セクション生成の応答をストリーミングで受信
+
+        本文（contentタグ）が閉じた時点で長さが不足していれば、
+        残りの受信を待たずに生成を打ち切る。
+
+        Args:
+            prompt (str): セクション生成用プロンプト（ログ用の全体）
+            section_count (int): セクション番号
+            request (str): 実際に送信するプロンプト
+            cache_key (Optional[str], optional): プレフィックスのキャッシュキー
+
+        Returns:
+            str: LLMからの応答全体
+
+        Raises:
+            ValueError: 本文の長さが不足している場合
+        """
+        chunks = []
+
+        async def record(stream):
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+
+        # キャッシュ非対応のLLMには従来どおりプロンプトのみを渡す
+        if cache_key is None:
+            llm_stream = self.llm.agenerate_stream(request)
+        else:
+            llm_stream = self.llm.agenerate_stream(request, cache_key=cache_key)
+
+        async with aclosing(llm_stream) as stream:
+            async for tag, content in self.parser.parse_section_data_stream(
+                record(stream)
+            ):
+                if tag != "content":
+                    continue
+
+                logger.info(
+                    f"セクション {section_count} の本文を受信（{len(content)}文字）"
+                )
+                if len(content) < self.MIN_CONTENT_LENGTH:
+                    self.log_manager.log_llm_interaction(
+                        f"セクション {section_count} 生成（本文不足で中断）",
+                        prompt,
+                        "".join(chunks),
+                    )
+                    raise ValueError("セクションの長さが不足しています（受信を中断）")
+
+        return "".join(chunks)
+
+    async def agenerate_section(
+        self, section_count: int, max_retries: int = 3
+    ) -> SectionData:
         """セクションを生成
 
+        5セクションごとの計画見直しはセクション生成と同じリクエストで行い、
+        見直し結果は次のセクション以降のプロンプトに反映される。
+        応答に見直し結果が含まれない場合は、見直しのみを別途実行する。
+
         Args:
             section_count (int): セクション番号
             max_retries (int, optional): 最大リトライ回数. デフォルトは3.
@@ -36,21 +154,96 @@ class SectionManager:
         Returns:
             SectionData: 生成されたセクションデータ
         """
+        # 古いセクションをあらすじにまとめる
+        await self._aupdate_digest()
 
         # 5セクションごとの計画見直し
         if section_count % 5 == 0 and section_count > 0:
-            self._review_plan(section_count)
+            prefix, suffix = (
+                self.prompt_manager.get_combined_review_and_section_prompt_parts(
+                    self.story_context, section_count
+                )
+            )
+            section_data, response = await self._agenerate_with_retries(
+                prefix, suffix, section_count, max_retries
+            )
+
+            review_result = self.parser.parse_plan_review_if_present(response)
+            if review_result is None:
+                logger.warning(
+                    f"計画見直しの結果が得られなかったため、個別に実行します（セクション {section_count}）"
+                )
+                try:
+                    await self._areview_plan(section_count)
+                except Exception as e:
+                    # セクションは生成・検証済みのため、見直しの失敗では破棄しない
+                    logger.warning(
+                        f"計画見直しに失敗したため、現在の計画のまま続行します（セクション {section_count}）: {str(e)}"
+                    )
+            else:
+                self._apply_plan_review(section_count, review_result)
+            return section_data
 
         # プロンプトの生成時に、最新の計画調整を反映
-        prompt = self.prompt_manager.get_section_generation_prompt(
-            self.story_context, 
+        prefix, suffix = self.prompt_manager.get_section_generation_prompt_parts(
+            self.story_context,
             section_count
         )
+        section_data, _ = await self._agenerate_with_retries(
+            prefix, suffix, section_count, max_retries
+        )
+        return section_data
+
+    async def agenerate_planned_section(
+        self, section_count: int, planned_section: StorySection, max_retries: int = 3
+    ) -> SectionData:
+        """計画セクションを前後の本文に依存せず生成（並列下書き用）
+
+        Args:
+            section_count (int): セクション番号
+            planned_section (StorySection): 担当する計画セクション
+            max_retries (int, optional): 最大リトライ回数. デフォルトは3.
+
+        Returns:
+            SectionData: 生成されたセクションデータ
+        """
+        prefix, suffix = self.prompt_manager.get_section_generation_prompt_parts(
+            self.story_context, section_count, planned_section
+        )
+        section_data, _ = await self._agenerate_with_retries(
+            prefix, suffix, section_count, max_retries
+        )
+        return section_data
+
+    async def _agenerate_with_retries(
+        self, prefix: str, suffix: str, section_count: int, max_retries: int
+    ) -> Tuple[SectionData, str]:
+        """品質チェックに通るまでセクション生成をリトライ
+
+        プレフィックスをキャッシュできた場合は後半のみを送信する。
+
+        Args:
+            prefix (str): セクション生成用プロンプトの共通プレフィックス
+            suffix (str): セクション生成用プロンプトの後半
+            section_count (int): セクション番号
+            max_retries (int): 最大リトライ回数
+
+        Returns:
+            Tuple[SectionData, str]: 生成されたセクションデータと、採用した応答
+
+        Raises:
+            ValueError: すべての試行が失敗した場合
+        """
+        prompt = prefix + suffix
+        cache_key = await self._aget_cache_key(prefix)
+        request = suffix if cache_key is not None else prompt
 
         last_error = None
         for attempt in range(max_retries):
             try:
-                response = self.llm.generate(prompt)
+                response = await self._agenerate_section_response(
+                    prompt, section_count, request, cache_key
+                )
                 self.log_manager.log_llm_interaction(
                     f"セクション {section_count} 生成（試行 {attempt + 1}/{max_retries}）",
                     prompt,
@@ -67,7 +260,7 @@ class SectionManager:
                     f"セクション {section_count} の生成が完了"
                     f"（進行度: {section_data.progress.percentage}%）"
                 )
-                return section_data
+                return section_data, response
 
             except Exception as e:
                 last_error = e
@@ -87,22 +280,62 @@ class SectionManager:
         raise ValueError(error_msg)
 
     def _quality_check(self, section_data: SectionData) -> bool:
-        """品質チェック"""
-        if not section_data.content or not section_data.progress or not section_data.next_preview:
-            logger.warning("必要な要素が不足しています")
-            return False
+        """品質チェック
+
+        最も失敗しやすい本文の長さから順に確認し、不合格時のみ理由を記録する。
+        """
+        content = section_data.content
+        if not content or len(content) < self.MIN_CONTENT_LENGTH:
+            reason = "セクションの長さが不足しています"
+        elif section_data.progress is None or not section_data.next_preview:
+            reason = "必要な要素が不足しています"
+        elif not (0 <= section_data.progress.percentage <= 100):
+            reason = "進行度の値が不適切です"
+        else:
+            return True
 
-        if len(section_data.content) < 1000:
-            logger.warning("セクションの長さが不足しています")
-            return False
+        logger.warning(reason)
+        return False
 
-        if not (0 <= section_data.progress.percentage <= 100):
-            logger.warning("進行度の値が不適切です")
-            return False
+    async def _aupdate_digest(self) -> None:
+        """本文をそのまま送るセクションが溜まったら、古い分をあらすじにまとめる
 
-        return True
+        直近context_window個のセクションは本文のまま残し、あらすじの更新は
+        context_window個のセクションごとに行う. 更新に失敗した場合は
+        本文のまま送り続け、次のセクションで再度試みる.
+        """
+        window = self.prompt_manager.context_window
+        if window <= 0:
+            return
+
+        story_context = self.story_context
+        digest_upto = len(story_context.sections) - window
+        if digest_upto - story_context.digest_section_count < window:
+            return
+
+        logger.info(f"あらすじの更新を開始（セクション {digest_upto} まで）")
+        prompt = self.prompt_manager.get_content_digest_prompt(
+            story_context, digest_upto
+        )
+
+        try:
+            response = await self.llm.agenerate(prompt)
+            self.log_manager.log_llm_interaction(
+                f"あらすじ更新（セクション {digest_upto} まで）", prompt, response
+            )
+        except Exception as e:
+            logger.warning(f"あらすじの更新中にエラー: {str(e)}")
+            return
+
+        digest = self.parser.extract_tag_content(response, "digest")
+        if not digest:
+            logger.warning("digestタグが見つからないため、あらすじを更新しません")
+            return
+
+        story_context.update_digest(digest, digest_upto)
+        logger.info(f"あらすじを更新しました（セクション {digest_upto} まで）")
 
-    def _review_plan(self, section_count: int) -> None:
+    async def _areview_plan(self, section_count: int) -> None:
         """計画の見直しを実行し、結果を反映
         
         Args:
@@ -116,34 +349,44 @@ class SectionManager:
 
         try:
             # LLMからの応答を取得
-            response = self.llm.generate(prompt)
+            response = await self.llm.agenerate(prompt)
             self.log_manager.log_llm_interaction(
                 f"計画見直し（セクション {section_count}）", prompt, response
             )
 
-            # 計画の見直し結果を解析
+            # 計画の見直し結果を解析して反映
             review_result = self.parser.parse_plan_review(response)
+            self._apply_plan_review(section_count, review_result)
 
-            # PlanAdjustmentオブジェクトを作成
-            adjustment = PlanAdjustment(
-                timestamp=datetime.now(),
-                analysis=review_result["analysis"],
-                adjustments=review_result["adjustments"],
-                future_plans=review_result["future_plans"],
-                thinking_process=review_result["thinking_process"]
-            )
+        except Exception as e:
+            logger.error(f"計画見直し中にエラー: {str(e)}")
+            raise
 
-            # StoryPlanに調整を適用
-            self.story_context.story_plan.add_adjustment(adjustment)
+    def _apply_plan_review(
+        self, section_count: int, review_result: Dict[str, str]
+    ) -> None:
+        """計画見直しの結果を展開計画に反映
+
+        Args:
+            section_count (int): 現在のセクション番号
+            review_result (Dict[str, str]): parse_plan_reviewの結果
+        """
+        # PlanAdjustmentオブジェクトを作成
+        adjustment = PlanAdjustment(
+            timestamp=datetime.now(),
+            analysis=review_result["analysis"],
+            adjustments=review_result["adjustments"],
+            future_plans=review_result["future_plans"],
+            thinking_process=review_result["thinking_process"]
+        )
 
-            # ログに記録
-            self.log_manager.log_structured_data("plan_review", {
-                "section": section_count,
-                "adjustment": adjustment.to_dict()
-            })
+        # StoryPlanに調整を適用
+        self.story_context.story_plan.add_adjustment(adjustment)
 
-            logger.info(f"計画見直しが完了し、更新を適用しました（セクション {section_count}）")
+        # ログに記録
+        self.log_manager.log_structured_data("plan_review", {
+            "section": section_count,
+            "adjustment": adjustment
+        })
 
-        except Exception as e:
-            logger.error(f"計画見直し中にエラー: {str(e)}")
-            raise
\ No newline at end of file
+        logger.info(f"計画見直しが完了し、更新を適用しました（セクション {section_count}）")
\ No newline at end of file
@@ -1,16 +1,23 @@
-import json
+import asyncio
 import logging
 import os
+import time
 from datetime import datetime
-from typing import Any, Dict
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 
+import orjson
+
+from ..config.settings import AppConfig
 from ..llm.base import BaseLLM
 from ..logging.log_manager import LogManager
 from ..models.data_models import (
     GenerationMetadata,
+    SectionData,
     StoryBaseSettings,
     StoryContext,
     StoryPlan,
+    StorySection,
 )
 from .parser import ResponseParser
 from .prompt_manager import PromptManager
@@ -22,9 +29,17 @@ logger = logging.getLogger(__name__)
 class StoryManager:
     """物語生成の管理を行うクラス"""
 
+    # セクション生成ごとのメタデータを書き込む最短間隔（秒）
+    METADATA_WRITE_INTERVAL = 2.0
+    # 間隔に関係なくすぐに書き込むステータス
+    IMMEDIATE_METADATA_STATUSES = frozenset({"initialized", "completed", "error"})
+    # 物語ファイルの見出しとセクションの区切り
+    STORY_HEADER = "=== 物語 ===\n\n"
+    SECTION_SEPARATOR = "\n\n"
+
     def __init__(
         self,
-        config: Dict[str, Any],
+        config: AppConfig,
         llm: BaseLLM,
         log_manager: LogManager,
         prompt_manager: PromptManager,
@@ -33,7 +48,7 @@ class StoryManager:
         """初期化
 
         Args:
-            config (Dict[str, Any]): 設定情報
+            config (AppConfig): 設定情報
             llm (BaseLLM): LLMインスタンス
             log_manager (LogManager): ログ管理
             prompt_manager (PromptManager): プロンプト管理
@@ -46,39 +61,59 @@ class StoryManager:
         self.parser = parser
 
         # 出力ディレクトリの設定
-        self.output_dir = "output" + "/" + self.config["output_dir"]
+        self.output_dir = Path("output") / self.config.output_dir
         self._ensure_output_directory()
 
         # 出力ファイルのパス設定
-        self.story_file = os.path.join(self.output_dir, "story.txt")
-        self.metadata_file = os.path.join(self.output_dir, "metadata.json")
+        self.story_file = self.output_dir / "story.txt"
+        self.metadata_file = self.output_dir / "metadata.json"
+        self._metadata_tmp_file = self.output_dir / "metadata.json.tmp"
 
-        # ストーリーコンテキストの初期化
+        # ストーリーコンテキストの初期化（total_lengthはinitialize_storyで設定）
         self.story_context = StoryContext(
-            story_setting=config["story_setting"],
-            base_settings=None,
-            story_plan=None,
-            sections=[],
-            progress=0.0,
+            story_setting=config.story_setting,
             total_length="",
         )
+        # 計画セクションを並列に下書きするか（同時実行数はLLM側で制限する）
+        self.parallel_draft = self.config.generation.parallel_draft
 
         # セクションマネージャーの初期化
         self.section_manager = None  # initialize_storyで初期化
 
-        # ファイルの初期化
-        self._initialize_files()
+        # 出力ファイルの状態（ファイルはainitialize_storyで初期化し、生成中開いたままにする）
+        self._story_fp = None
+        self._last_metadata_write = 0.0
+        self._pending_metadata: Optional[Dict[str, Any]] = None
+
+    def __enter__(self) -> "StoryManager":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """未書き込みのメタデータを保存し、物語ファイルを閉じる"""
+        if self._pending_metadata is not None:
+            self._write_metadata(self._pending_metadata)
+        if self._story_fp is not None:
+            self._story_fp.close()
+            self._story_fp = None
+
+    def _open_story_file(self, mode: str) -> None:
+        """物語ファイルを書き込み用に開く"""
+        self._story_fp = open(
+            self.story_file, mode, encoding="utf-8", buffering=1 << 16
+        )
 
     def _ensure_output_directory(self) -> None:
         """出力ディレクトリの確保"""
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            logger.info(f"出力ディレクトリを作成しました: {self.output_dir}")
+        os.makedirs(self.output_dir, exist_ok=True)
 
     def _initialize_files(self) -> None:
         """出力ファイルの初期化"""
-        with open(self.story_file, "w", encoding="utf-8") as f:
-            f.write("=== 物語 ===\n\n")
+        self.close()
+        self._open_story_file("w")
+        self._story_fp.write(self.STORY_HEADER)
         logger.info(f"物語ファイルを初期化: {self.story_file}")
 
         self._save_metadata(
@@ -91,7 +126,11 @@ class StoryManager:
         )
 
     def _save_metadata(self, metadata: GenerationMetadata) -> None:
-        """メタデータの保存"""
+        """メタデータの保存
+
+        セクション生成ごとの更新は一定間隔に間引き、間引いた内容は
+        次の書き込みかclose時に保存する。開始・完了・エラーはすぐに書き込む。
+        """
         metadata_dict = {
             "status": metadata.status,
             "current_section": metadata.current_section,
@@ -102,16 +141,38 @@ class StoryManager:
         if metadata.error_message:
             metadata_dict["error_message"] = metadata.error_message
 
-        with open(self.metadata_file, "w", encoding="utf-8") as f:
-            json.dump(metadata_dict, ensure_ascii=False, indent=2, fp=f)
+        if (
+            metadata.status not in self.IMMEDIATE_METADATA_STATUSES
+            and time.monotonic() - self._last_metadata_write
+            < self.METADATA_WRITE_INTERVAL
+        ):
+            self._pending_metadata = metadata_dict
+            return
+
+        self._write_metadata(metadata_dict)
+
+    def _write_metadata(self, metadata_dict: Dict[str, Any]) -> None:
+        """メタデータを一時ファイル経由で置き換える（読み手に書きかけを見せない）"""
+        # メタデータが示す時点まで物語ファイルとログを書き出しておく
+        if self._story_fp is not None:
+            self._story_fp.flush()
+        self.log_manager.flush()
+
+        with open(self._metadata_tmp_file, "wb") as f:
+            f.write(orjson.dumps(metadata_dict, option=orjson.OPT_INDENT_2))
+        os.replace(self._metadata_tmp_file, self.metadata_file)
+
+        self._last_metadata_write = time.monotonic()
+        self._pending_metadata = None
 
     def _append_story(self, section_number: int, content: str) -> None:
         """物語本文の追記"""
-        with open(self.story_file, "a", encoding="utf-8") as f:
-            f.write(content.strip())
-            f.write("\n\n")
+        if self._story_fp is None:
+            self._open_story_file("a")
+        self._story_fp.write(content.strip())
+        self._story_fp.write(self.SECTION_SEPARATOR)
 
-    def _generate_base_settings(
+    async def _agenerate_base_settings(
         self, story_setting: str, total_length: str
     ) -> StoryBaseSettings:
         """基本設定を生成"""
@@ -121,7 +182,7 @@ class StoryManager:
         )
 
         try:
-            response = self.llm.generate(prompt)
+            response = await self.llm.agenerate(prompt)
             self.log_manager.log_llm_interaction("基本設定生成", prompt, response)
             base_settings = self.parser.parse_base_settings(response)
             logger.info("基本設定の生成が完了")
@@ -131,7 +192,7 @@ class StoryManager:
             logger.error(f"基本設定の生成中にエラー: {str(e)}")
             raise
 
-    def _generate_story_plan(self, base_settings: StoryBaseSettings) -> StoryPlan:
+    async def _agenerate_story_plan(self, base_settings: StoryBaseSettings) -> StoryPlan:
         """展開計画を生成"""
         logger.info("展開計画の生成を開始")
         prompt = self.prompt_manager.get_story_plan_prompt(
@@ -139,7 +200,7 @@ class StoryManager:
         )
 
         try:
-            response = self.llm.generate(prompt)
+            response = await self.llm.agenerate(prompt)
             self.log_manager.log_llm_interaction("展開計画生成", prompt, response)
             story_plan = self.parser.parse_story_plan(response)
             logger.info("展開計画の生成が完了")
@@ -151,92 +212,184 @@ class StoryManager:
 
     def get_current_length(self) -> int:
         """現在の文字数を取得"""
-        return sum(len(section.content) for section in self.story_context.sections)
+        return self.story_context.current_length
 
-    def generate_full_story(self, max_sections: int, total_length: str) -> str:
-        """物語全体を生成"""
-        logger.info("=== 物語生成開始 ===")
+    def _record_section(self, section_count: int, section_data: SectionData) -> bool:
+        """生成したセクションを反映
 
-        # 物語の初期化
-        self.initialize_story(total_length)
+        Args:
+            section_count (int): セクション番号
+            section_data (SectionData): 生成されたセクションデータ
+
+        Returns:
+            bool: 物語が完結した場合はTrue
+        """
+        self.story_context.add_section(section_data)
+        self._append_story(section_count, section_data.content)
+
+        # メタデータの更新
+        self._save_metadata(
+            GenerationMetadata(
+                status="section_generated",
+                current_section=section_count,
+                progress=section_data.progress.percentage,
+                timestamp=datetime.now(),
+            )
+        )
+
+        # 進捗のログ出力
+        current_length = self.get_current_length()
+        logger.info(
+            f"セクション {section_count} 完了: 現在の文字数 {current_length}文字"
+        )
+
+        # 完了判定
+        if section_data.progress.percentage >= 100:
+            logger.info("=== 物語が完結しました ===")
+            self._save_metadata(
+                GenerationMetadata(
+                    status="completed",
+                    current_section=section_count,
+                    progress=100,
+                    timestamp=datetime.now(),
+                )
+            )
+            return True
+
+        return False
+
+    def _save_error_metadata(self, section_count: int, error: Exception) -> None:
+        """エラー発生時のメタデータ保存"""
+        self._save_metadata(
+            GenerationMetadata(
+                status="error",
+                current_section=section_count,
+                error_message=str(error),
+                timestamp=datetime.now(),
+            )
+        )
+
+    async def _agenerate_sections_batch(
+        self, planned_sections: List[StorySection]
+    ) -> List[SectionData]:
+        """計画セクションの下書きを並列に生成
+
+        同時実行数はLLM（BatchedLLM）側で制限される。いずれかの下書きが
+        失敗した場合は残りの下書きをキャンセルし、終了を待ってから
+        失敗したセクションのエラーを送出する。
+
+        Args:
+            planned_sections (List[StorySection]): 下書きする計画セクション
+
+        Returns:
+            List[SectionData]: 計画順に並んだセクションデータ
+
+        Raises:
+            Exception: 下書きに失敗した場合（計画順で最初に失敗したセクションのエラー）
+        """
+        tasks: List[asyncio.Task] = []
+        try:
+            async with asyncio.TaskGroup() as tg:
+                for section_count, planned_section in enumerate(
+                    planned_sections, start=1
+                ):
+                    tasks.append(
+                        tg.create_task(
+                            self.section_manager.agenerate_planned_section(
+                                section_count, planned_section
+                            )
+                        )
+                    )
+        except ExceptionGroup:
+            for section_count, task in enumerate(tasks, start=1):
+                if task.cancelled() or task.exception() is None:
+                    continue
+                error = task.exception()
+                logger.error(f"セクション {section_count} の下書き中にエラー: {str(error)}")
+                self._save_error_metadata(section_count, error)
+                raise error
+            raise
 
+        return [task.result() for task in tasks]
+
+    async def _agenerate_sections(self, max_sections: int) -> None:
+        """セクションを完結または最大セクション数まで生成"""
         section_count = 0
-        while section_count < max_sections:
+        completed = False
+
+        # 計画セクションは本文に依存しないため並列に下書きする
+        if self.parallel_draft:
+            planned_sections = self.story_context.story_plan.sections[:max_sections]
+            logger.info(f"計画セクション {len(planned_sections)} 件の並列下書きを開始")
+
+            # 下書きの失敗はどのセクションかを含めて_agenerate_sections_batchで記録する
+            drafted_sections = await self._agenerate_sections_batch(planned_sections)
+
+            try:
+                for section_data in drafted_sections:
+                    section_count += 1
+                    completed = self._record_section(section_count, section_data)
+                    if completed:
+                        break
+
+            except Exception as e:
+                logger.error(f"セクション {section_count} の記録中にエラー: {str(e)}")
+                self._save_error_metadata(section_count, e)
+                raise
+
+        # 以降のセクションは前の本文に依存するため逐次生成する
+        while not completed and section_count < max_sections:
             section_count += 1
             logger.info(f"セクション {section_count} の生成を開始")
 
             try:
                 # セクションの生成
-                section_data = self.section_manager.generate_section(section_count)
-                self.story_context.sections.append(section_data)
-                self._append_story(section_count, section_data.content)
-
-                # メタデータの更新
-                self._save_metadata(
-                    GenerationMetadata(
-                        status="section_generated",
-                        current_section=section_count,
-                        progress=section_data.progress.percentage,
-                        timestamp=datetime.now(),
-                    )
+                section_data = await self.section_manager.agenerate_section(
+                    section_count
                 )
-
-                # 進捗のログ出力
-                current_length = self.get_current_length()
-                logger.info(
-                    f"セクション {section_count} 完了: 現在の文字数 {current_length}文字"
-                )
-
-                # 完了判定
-                if section_data.progress.percentage >= 100:
-                    logger.info("=== 物語が完結しました ===")
-                    self._save_metadata(
-                        GenerationMetadata(
-                            status="completed",
-                            current_section=section_count,
-                            progress=100,
-                            timestamp=datetime.now(),
-                        )
-                    )
-                    break
+                completed = self._record_section(section_count, section_data)
 
             except Exception as e:
                 logger.error(f"セクション {section_count} の生成中にエラー: {str(e)}")
-                self._save_metadata(
-                    GenerationMetadata(
-                        status="error",
-                        current_section=section_count,
-                        error_message=str(e),
-                        timestamp=datetime.now(),
-                    )
-                )
+                self._save_error_metadata(section_count, e)
                 raise
 
-        # 生成された物語全体を返す
-        with open(self.story_file, "r", encoding="utf-8") as f:
-            return f.read()
+    async def agenerate_full_story(self, max_sections: int, total_length: str) -> str:
+        """物語全体を生成"""
+        logger.info("=== 物語生成開始 ===")
+
+        # 物語の初期化
+        await self.ainitialize_story(total_length)
 
-    def initialize_story(self, total_length: str) -> None:
+        try:
+            await self._agenerate_sections(max_sections)
+        finally:
+            await self.section_manager.arelease_prompt_cache()
+            self.close()
+
+        # 生成された物語全体を返す（ファイルと同じ内容をセクションから組み立てる）
+        return self.STORY_HEADER + "".join(
+            section.content.strip() + self.SECTION_SEPARATOR
+            for section in self.story_context.sections
+        )
+
+    async def ainitialize_story(self, total_length: str) -> None:
         """物語の初期化を行う"""
         logger.info("=== 物語の初期化を開始 ===")
 
-        self.story_context = StoryContext(
-            story_setting=self.config["story_setting"],
-            total_length=total_length,  # これが確実に設定されているか確認
-            base_settings=None,
-            story_plan=None,
-            sections=[],
-            progress=0.0,
-            current_length=0,
-        )
+        # コンテキストは作り直さずに初期化し、参照先を一定に保つ
+        self.story_context.reset(total_length)
+
+        # 前回の物語が残らないよう、出力ファイルも生成のたびに作り直す
+        self._initialize_files()
 
         # 基本設定の生成
-        self.story_context.base_settings = self._generate_base_settings(
+        self.story_context.base_settings = await self._agenerate_base_settings(
             self.story_context.story_setting, total_length
         )
 
         # 展開計画の生成
-        self.story_context.story_plan = self._generate_story_plan(
+        self.story_context.story_plan = await self._agenerate_story_plan(
             self.story_context.base_settings
         )
 
@@ -249,6 +402,9 @@ class StoryManager:
             self.story_context,
         )
 
+        # 基本設定と展開計画が確定したので、プロンプトの共通部分を登録
+        await self.section_manager.aprepare_prompt_cache()
+
         self._save_metadata(
             GenerationMetadata(
                 status="initialized",
@@ -1,7 +1,8 @@
 """LLMの基底クラスを提供するモジュール"""
 
 from abc import ABC, abstractmethod
-from typing import Dict, Any
+from typing import Any, AsyncIterator, Dict, Optional
+import asyncio
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,6 +45,76 @@ class BaseLLM(ABC):
         """
         pass
 
+    def create_cache(self, prefix: str, ttl_seconds: int = 3600) -> Optional[str]:
+        """プロンプトの共通プレフィックスをコンテキストキャッシュに登録
+
+        デフォルトではキャッシュに対応せずNoneを返す。
+        コンテキストキャッシュを持つLLMではオーバーライドすること。
+
+        Args:
+            prefix (str): 複数のリクエストで共通するプロンプトの前半
+            ttl_seconds (int, optional): キャッシュの有効期間（秒）. デフォルトは3600.
+
+        Returns:
+            Optional[str]: キャッシュキー. 登録できなかった場合はNone
+        """
+        return None
+
+    def delete_cache(self, cache_key: str) -> None:
+        """コンテキストキャッシュを削除
+
+        Args:
+            cache_key (str): create_cacheが返したキャッシュキー
+        """
+        pass
+
+    async def agenerate(self, prompt: str, cache_key: Optional[str] = None) -> str:
+        """非同期でテキスト生成を行う
+
+        デフォルトでは同期版の generate を別スレッドで実行する。
+        非同期APIを持つLLMではオーバーライドすること。
+
+        Args:
+            prompt (str): 入力プロンプト. cache_key指定時はキャッシュした
+                プレフィックスに続く部分のみ
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Returns:
+            str: 生成されたテキスト
+
+        Raises:
+            Exception: 生成処理に失敗した場合
+        """
+        if cache_key is None:
+            # generateをprompt引数のみで実装したLLMにも対応する
+            return await asyncio.to_thread(self.generate, prompt)
+        return await asyncio.to_thread(self.generate, prompt, cache_key)
+
+    async def agenerate_stream(
+        self, prompt: str, cache_key: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """ストリーミングでテキスト生成を行う
+
+        デフォルトでは agenerate の結果を1つのチャンクとして返す。
+        ストリーミングAPIを持つLLMではオーバーライドすること。
+
+        Args:
+            prompt (str): 入力プロンプト. cache_key指定時はキャッシュした
+                プレフィックスに続く部分のみ
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Yields:
+            str: 生成されたテキストのチャンク
+
+        Raises:
+            Exception: 生成処理に失敗した場合
+        """
+        if cache_key is None:
+            # agenerateをprompt引数のみでオーバーライドしたLLMにも対応する
+            yield await self.agenerate(prompt)
+        else:
+            yield await self.agenerate(prompt, cache_key=cache_key)
+
     def _validate_config(self, required_keys: list) -> None:
         """設定の検証
 
@@ -0,0 +1,124 @@
+"""LLM呼び出しの同時実行数を制限するラッパー"""
+
+from typing import AsyncIterator, Optional
+import asyncio
+import logging
+from .base import BaseLLM
+
+logger = logging.getLogger(__name__)
+
+
+class BatchedLLM(BaseLLM):
+    """同時に発行されたLLM呼び出しを最大同時実行数までに絞って委譲するクラス
+
+    プロバイダのレート制限を超えないよう、非同期の生成呼び出しは
+    セマフォを取得してから委譲先のLLMに渡す。
+    """
+
+    def __init__(self, delegate: BaseLLM, max_concurrency: int):
+        """初期化
+
+        Args:
+            delegate (BaseLLM): 呼び出しを委譲するLLMインスタンス
+            max_concurrency (int): 最大同時実行数
+
+        Raises:
+            ValueError: 最大同時実行数が1未満の場合
+        """
+        self.validate_concurrency(max_concurrency)
+        self.delegate = delegate
+        self.max_concurrency = max_concurrency
+        # セマフォはイベントループごとに作成する
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._semaphore_loop: Optional[asyncio.AbstractEventLoop] = None
+        super().__init__(delegate.config)
+
+    @staticmethod
+    def validate_concurrency(max_concurrency: int) -> None:
+        """最大同時実行数の検証（0以下ではセマフォを取得できず呼び出しが止まる）
+
+        Args:
+            max_concurrency (int): 最大同時実行数
+
+        Raises:
+            ValueError: 最大同時実行数が1未満の場合
+        """
+        if max_concurrency < 1:
+            raise ValueError(
+                f"最大同時実行数は1以上を指定してください: {max_concurrency}"
+            )
+
+    def initialize(self) -> None:
+        """初期化（委譲先で初期化済みのため何もしない）"""
+        self.model = self.delegate.model
+        logger.info(f"LLM呼び出しの最大同時実行数: {self.max_concurrency}")
+
+    def _get_semaphore(self) -> asyncio.Semaphore:
+        """実行中のイベントループに対応するセマフォを取得"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    def generate(self, prompt: str, cache_key: Optional[str] = None) -> str:
+        """テキスト生成を行う（同期呼び出しはそのまま委譲）
+
+        Args:
+            prompt (str): 入力プロンプト
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Returns:
+            str: 生成されたテキスト
+        """
+        if cache_key is None:
+            return self.delegate.generate(prompt)
+        return self.delegate.generate(prompt, cache_key=cache_key)
+
+    async def agenerate(self, prompt: str, cache_key: Optional[str] = None) -> str:
+        """同時実行数を制限して非同期でテキスト生成を行う
+
+        Args:
+            prompt (str): 入力プロンプト
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Returns:
+            str: 生成されたテキスト
+        """
+        async with self._get_semaphore():
+            if cache_key is None:
+                return await self.delegate.agenerate(prompt)
+            return await self.delegate.agenerate(prompt, cache_key=cache_key)
+
+    async def agenerate_stream(
+        self, prompt: str, cache_key: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """同時実行数を制限してストリーミングでテキスト生成を行う
+
+        ストリームを最後まで受信するか閉じるまでセマフォを保持する。
+
+        Args:
+            prompt (str): 入力プロンプト
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Yields:
+            str: 生成されたテキストのチャンク
+        """
+        async with self._get_semaphore():
+            if cache_key is None:
+                stream = self.delegate.agenerate_stream(prompt)
+            else:
+                stream = self.delegate.agenerate_stream(prompt, cache_key=cache_key)
+            try:
+                async for chunk in stream:
+                    yield chunk
+            finally:
+                await stream.aclose()
+
+    def create_cache(self, prefix: str, ttl_seconds: int = 3600) -> Optional[str]:
+        """コンテキストキャッシュの作成を委譲"""
+        return self.delegate.create_cache(prefix, ttl_seconds)
+
+    def delete_cache(self, cache_key: str) -> None:
+        """コンテキストキャッシュの削除を委譲"""
+        self.delegate.delete_cache(cache_key)
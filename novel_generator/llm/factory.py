@@ -1,9 +1,10 @@
 """LLMインスタンスを生成するファクトリークラス"""
 
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Type, Union
+import importlib
 import logging
 from .base import BaseLLM
-from .gemini import GeminiLLM
+from .batched import BatchedLLM
 
 logger = logging.getLogger(__name__)
 
@@ -11,30 +12,39 @@ logger = logging.getLogger(__name__)
 class LLMFactory:
     """LLMファクトリークラス"""
 
-    # サポートされているLLMの一覧
-    SUPPORTED_LLMS = {
-        "gemini": GeminiLLM,
+    # サポートされているLLMの一覧（"モジュール:クラス名"で指定し、使用時に読み込む）
+    SUPPORTED_LLMS: Dict[str, Union[str, Type[BaseLLM]]] = {
+        "gemini": ".gemini:GeminiLLM",
         # 今後、他のLLMを追加する場合はここに追加
         # "gpt4": GPT4LLM,
         # "claude": ClaudeLLM,
     }
 
     @classmethod
-    def create(cls, llm_type: str, config: Dict[str, Any]) -> BaseLLM:
+    def create(
+        cls, llm_type: str, config: Dict[str, Any], concurrency: Optional[int] = None
+    ) -> BaseLLM:
         """LLMインスタンスを生成
 
         Args:
             llm_type (str): LLMの種類
             config (Dict[str, Any]): 設定情報
+            concurrency (Optional[int], optional): 非同期呼び出しの最大同時実行数.
+                指定した場合はBatchedLLMで包んで制限する. デフォルトはNone（制限なし）.
 
         Returns:
             BaseLLM: LLMインスタンス
 
         Raises:
-            ValueError: サポートされていないLLM種別の場合
+            ValueError: サポートされていないLLM種別の場合、
+                または最大同時実行数が1未満の場合
         """
         llm_type = llm_type.lower()
 
+        # LLMの初期化（API接続など）より前に設定の誤りを検出する
+        if concurrency is not None:
+            BatchedLLM.validate_concurrency(concurrency)
+
         if llm_type not in cls.SUPPORTED_LLMS:
             supported = ", ".join(cls.SUPPORTED_LLMS.keys())
             raise ValueError(
@@ -42,8 +52,29 @@ class LLMFactory:
             )
 
         logger.info(f"LLM '{llm_type}' のインスタンスを生成します")
-        llm_class = cls.SUPPORTED_LLMS[llm_type]
-        return llm_class(config)
+        llm_class = cls._resolve_llm_class(cls.SUPPORTED_LLMS[llm_type])
+        llm = llm_class(config)
+        if concurrency is not None:
+            return BatchedLLM(llm, concurrency)
+        return llm
+
+    @staticmethod
+    def _resolve_llm_class(entry: Union[str, Type[BaseLLM]]) -> Type[BaseLLM]:
+        """登録内容からLLMクラスを取得
+
+        Args:
+            entry (Union[str, Type[BaseLLM]]): "モジュール:クラス名"形式の文字列
+                （先頭が"."の場合はこのパッケージからの相対指定）またはクラス
+
+        Returns:
+            Type[BaseLLM]: LLMクラス
+        """
+        if not isinstance(entry, str):
+            return entry
+
+        module_name, _, class_name = entry.partition(":")
+        module = importlib.import_module(module_name, package=__package__)
+        return getattr(module, class_name)
 
     @classmethod
     def get_supported_llms(cls) -> list:
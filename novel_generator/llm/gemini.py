@@ -1,7 +1,8 @@
 """Gemini APIを使用するLLM実装"""
 
-import google.generativeai as genai
 import logging
+from datetime import timedelta
+from typing import AsyncIterator, Optional
 from .base import BaseLLM
 
 logger = logging.getLogger(__name__)
@@ -24,6 +25,11 @@ class GeminiLLM(BaseLLM):
             logger.error("Gemini API keyが設定されていません")
             raise ValueError("Invalid API key")
 
+        # SDKは読み込みが重いため、Geminiを使う場合にのみインポートする
+        import google.generativeai as genai
+
+        self._genai = genai
+
         # Gemini APIの設定
         genai.configure(api_key=api_key)
 
@@ -32,16 +38,80 @@ class GeminiLLM(BaseLLM):
         generation_config = self._get_config_value("model", {})
 
         logger.info(f"Geminiモデル '{model_name}' を初期化します")
+        self.generation_config = generation_config
         self.model = genai.GenerativeModel(
             model_name=model_name, generation_config=generation_config
         )
+        # キャッシュキーごとのキャッシュとそれを参照するモデル
+        self._caches = {}
+        self._cached_models = {}
         logger.info("Geminiモデルの初期化が完了しました")
 
-    def generate(self, prompt: str) -> str:
+    def create_cache(self, prefix: str, ttl_seconds: int = 3600) -> Optional[str]:
+        """プロンプトの共通プレフィックスをコンテキストキャッシュに登録
+
+        モデルが対応していない場合や、プレフィックスがキャッシュの
+        最小トークン数に満たない場合はNoneを返す。
+
+        Args:
+            prefix (str): 複数のリクエストで共通するプロンプトの前半
+            ttl_seconds (int, optional): キャッシュの有効期間（秒）. デフォルトは3600.
+
+        Returns:
+            Optional[str]: キャッシュキー. 登録できなかった場合はNone
+        """
+        genai = self._genai
+        try:
+            cache = genai.caching.CachedContent.create(
+                model=self.model.model_name,
+                contents=[prefix],
+                ttl=timedelta(seconds=ttl_seconds),
+            )
+            model = genai.GenerativeModel.from_cached_content(
+                cached_content=cache, generation_config=self.generation_config
+            )
+        except Exception as e:
+            logger.warning(f"コンテキストキャッシュを作成できませんでした: {str(e)}")
+            return None
+
+        self._caches[cache.name] = cache
+        self._cached_models[cache.name] = model
+        logger.info(
+            f"コンテキストキャッシュを作成しました: {cache.name}（{len(prefix)} 文字）"
+        )
+        return cache.name
+
+    def delete_cache(self, cache_key: str) -> None:
+        """コンテキストキャッシュを削除
+
+        Args:
+            cache_key (str): create_cacheが返したキャッシュキー
+        """
+        self._cached_models.pop(cache_key, None)
+        cache = self._caches.pop(cache_key, None)
+        if cache is None:
+            return
+
+        try:
+            cache.delete()
+            logger.info(f"コンテキストキャッシュを削除しました: {cache_key}")
+        except Exception as e:
+            # 有効期限で自動的に削除されるため、失敗しても処理は続行する
+            logger.warning(f"コンテキストキャッシュの削除に失敗しました: {str(e)}")
+
+    def _get_model(self, cache_key: Optional[str]):
+        """キャッシュキーに対応するモデルを取得"""
+        if cache_key is None:
+            return self.model
+        return self._cached_models[cache_key]
+
+    def generate(self, prompt: str, cache_key: Optional[str] = None) -> str:
         """テキスト生成を行う
 
         Args:
-            prompt (str): 入力プロンプト
+            prompt (str): 入力プロンプト. cache_key指定時はキャッシュした
+                プレフィックスに続く部分のみ
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
 
         Returns:
             str: 生成されたテキスト
@@ -51,7 +121,7 @@ class GeminiLLM(BaseLLM):
         """
         try:
             logger.debug(f"プロンプト長: {len(prompt)} 文字")
-            response = self.model.generate_content(prompt)
+            response = self._get_model(cache_key).generate_content(prompt)
 
             if not response or not response.text:
                 raise ValueError("空の応答が返されました")
@@ -61,3 +131,65 @@ class GeminiLLM(BaseLLM):
         except Exception as e:
             logger.error(f"Geminiでの生成中にエラー: {str(e)}")
             raise
+
+    async def agenerate(self, prompt: str, cache_key: Optional[str] = None) -> str:
+        """非同期でテキスト生成を行う
+
+        Args:
+            prompt (str): 入力プロンプト. cache_key指定時はキャッシュした
+                プレフィックスに続く部分のみ
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Returns:
+            str: 生成されたテキスト
+
+        Raises:
+            Exception: 生成処理に失敗した場合
+        """
+        try:
+            logger.debug(f"プロンプト長: {len(prompt)} 文字")
+            response = await self._get_model(cache_key).generate_content_async(prompt)
+
+            if not response or not response.text:
+                raise ValueError("空の応答が返されました")
+
+            return response.text
+
+        except Exception as e:
+            logger.error(f"Geminiでの生成中にエラー: {str(e)}")
+            raise
+
+    async def agenerate_stream(
+        self, prompt: str, cache_key: Optional[str] = None
+    ) -> AsyncIterator[str]:
+        """ストリーミングでテキスト生成を行う
+
+        Args:
+            prompt (str): 入力プロンプト. cache_key指定時はキャッシュした
+                プレフィックスに続く部分のみ
+            cache_key (Optional[str], optional): create_cacheが返したキャッシュキー
+
+        Yields:
+            str: 生成されたテキストのチャンク
+
+        Raises:
+            Exception: 生成処理に失敗した場合
+        """
+        try:
+            logger.debug(f"プロンプト長: {len(prompt)} 文字")
+            response = await self._get_model(cache_key).generate_content_async(prompt, stream=True)
+
+            received = False
+            async for chunk in response:
+                # 終了理由のみのチャンクなどはテキストを持たない
+                if not chunk.parts:
+                    continue
+                received = True
+                yield chunk.text
+
+            if not received:
+                raise ValueError("空の応答が返されました")
+
+        except Exception as e:
+            logger.error(f"Geminiでの生成中にエラー: {str(e)}")
+            raise
@@ -1,8 +1,17 @@
+import csv
 import os
-import re
-from typing import List, Dict, Any
+from collections import deque
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime
 
+# ログのエントリを区切る行と、見出し・本文ブロックの開始行
+_SEPARATOR = "=" * 50
+_SEPARATOR_LINES = (_SEPARATOR + "\n", _SEPARATOR)
+_TIMESTAMP_PREFIX = "Timestamp: "
+_PROMPT_MARKER = "--- Prompt ---"
+_RESPONSE_MARKER = "--- Response ---"
+_THINKING_MARKER = "思考プロセス:"
+
 
 class LogAnalyzer:
     """ログ分析ユーティリティ"""
@@ -19,123 +28,180 @@ class LogAnalyzer:
         self.structured_log = os.path.join(output_dir, "generation_log.jsonl")
         self.length_log_file = os.path.join(output_dir, "length_progress.log")
 
-    def get_all_llm_interactions(self) -> List[Dict[str, str]]:
-        """すべてのLLMとのやり取りを取得"""
-        interactions = []
-        with open(self.raw_log_file, "r", encoding="utf-8") as f:
-            content = f.read()
-            sections = content.split("=" * 50)
-
-            for section in sections:
-                if not section.strip():
-                    continue
+    def _iter_log_entries(
+        self, path: str, markers: Tuple[str, ...]
+    ) -> Iterator[Tuple[Optional[str], Optional[str], List[str]]]:
+        """区切り線で区切られたログのエントリを1行ずつ読みながら返す
 
-                # セクションからデータを抽出
-                timestamp_match = re.search(r"Timestamp: (.*?)\n", section)
-                prompt_match = re.search(
-                    r"--- Prompt ---\n(.*?)\n--- Response ---", section, re.DOTALL
-                )
-                response_match = re.search(
-                    r"--- Response ---\n(.*?)$", section, re.DOTALL
-                )
+        エントリは見出し（フェーズ名とタイムスタンプ）と、マーカー行で
+        始まる本文ブロックからなる。ファイル全体をメモリに読み込まない。
 
-                if timestamp_match and prompt_match and response_match:
-                    interactions.append({
-                        "timestamp": timestamp_match.group(1).strip(),
-                        "prompt": prompt_match.group(1).strip(),
-                        "response": response_match.group(1).strip(),
-                    })
+        Args:
+            path (str): ログファイルのパス
+            markers (Tuple[str, ...]): 本文ブロックの開始を示す行（出現順）
 
-        return interactions
+        Yields:
+            Tuple[Optional[str], Optional[str], List[str]]: フェーズ名、
+                タイムスタンプ、到達した本文ブロックの内容
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            phase = None
+            timestamp = None
+            blocks: List[List[str]] = []
+            # 次の本文ブロックの開始行（改行付きと、ファイル末尾の改行なし）
+            marker_lines = [(marker + "\n", marker) for marker in markers]
+
+            for line in f:
+                # 行全体を固定文字列と比較し、本文の行ではコピーを作らない
+                if line in _SEPARATOR_LINES:
+                    yield phase, timestamp, ["".join(block).strip() for block in blocks]
+                    phase = None
+                    timestamp = None
+                    blocks = []
+                    continue
 
-    def get_thinking_process_timeline(self) -> List[Dict[str, str]]:
-        """思考プロセスのタイムラインを取得"""
-        timeline = []
-        with open(self.thinking_file, "r", encoding="utf-8") as f:
-            content = f.read()
-            sections = content.split("=" * 50)
+                if len(blocks) < len(markers) and line in marker_lines[len(blocks)]:
+                    blocks.append([])
+                    continue
 
-            for section in sections:
-                if not section.strip():
+                if blocks:
+                    blocks[-1].append(line)
                     continue
 
-                # セクションからデータを抽出
-                phase_match = re.search(r"=== (.*?) ===", section)
-                timestamp_match = re.search(r"Timestamp: (.*?)\n", section)
-                thinking_match = re.search(r"思考プロセス:\n(.*?)$", section, re.DOTALL)
+                # 見出し部分（フェーズ名とタイムスタンプ）
+                stripped = line.rstrip("\n")
+                if stripped.startswith("=== ") and stripped.endswith(" ==="):
+                    phase = stripped[4:-4].strip()
+                elif timestamp is None and stripped.startswith(_TIMESTAMP_PREFIX):
+                    timestamp = stripped[len(_TIMESTAMP_PREFIX) :].strip()
+
+            # 区切り線で終わっていない最後のエントリ
+            if blocks:
+                yield phase, timestamp, ["".join(block).strip() for block in blocks]
+
+    def iter_interactions(self) -> Iterator[Dict[str, str]]:
+        """LLMとのやり取りを1件ずつ取得"""
+        for _, timestamp, blocks in self._iter_log_entries(
+            self.raw_log_file, (_PROMPT_MARKER, _RESPONSE_MARKER)
+        ):
+            if timestamp and len(blocks) == 2:
+                yield {
+                    "timestamp": timestamp,
+                    "prompt": blocks[0],
+                    "response": blocks[1],
+                }
 
-                if phase_match and timestamp_match and thinking_match:
-                    timeline.append({
-                        "phase": phase_match.group(1).strip(),
-                        "timestamp": timestamp_match.group(1).strip(),
-                        "thinking": thinking_match.group(1).strip(),
-                    })
+    def get_all_llm_interactions(self) -> List[Dict[str, str]]:
+        """すべてのLLMとのやり取りを取得"""
+        return list(self.iter_interactions())
+
+    def iter_thinking_process(self) -> Iterator[Dict[str, str]]:
+        """思考プロセスを1件ずつ取得"""
+        for phase, timestamp, blocks in self._iter_log_entries(
+            self.thinking_file, (_THINKING_MARKER,)
+        ):
+            if phase and timestamp and blocks:
+                yield {
+                    "phase": phase,
+                    "timestamp": timestamp,
+                    "thinking": blocks[0],
+                }
 
-        return timeline
+    def get_thinking_process_timeline(self) -> List[Dict[str, str]]:
+        """思考プロセスのタイムラインを取得"""
+        return list(self.iter_thinking_process())
 
-    def analyze_generation_process(self) -> Dict[str, Any]:
-        """生成プロセスの分析"""
-        interactions = self.get_all_llm_interactions()
-        thinking_timeline = self.get_thinking_process_timeline()
+    def analyze_generation_process(
+        self, include_samples: bool = False, sample_limit: int = 3
+    ) -> Dict[str, Any]:
+        """生成プロセスの分析
 
+        Args:
+            include_samples (bool, optional): フェーズごとに思考プロセスの
+                サンプル（thinking_samples）を含めるか. デフォルトはFalse.
+            sample_limit (int, optional): フェーズごとに保持するサンプル数
+                （直近のものを残す）. デフォルトは3.
+
+        Returns:
+            Dict[str, Any]: 生成プロセスの統計情報
+        """
         # 基本的な統計情報
         stats = {
-            "total_interactions": len(interactions),
-            "total_thinking_processes": len(thinking_timeline),
+            "total_interactions": 0,
+            "total_thinking_processes": 0,
             "generation_duration": None,
             "phases": {},
         }
 
-        # 時系列での分析
-        if interactions:
-            first_timestamp = datetime.strptime(
-                interactions[0]["timestamp"], "%Y-%m-%d %H:%M:%S"
+        # 時系列での分析（やり取りの本文は保持しない）
+        first_timestamp = None
+        last_timestamp = None
+        for interaction in self.iter_interactions():
+            stats["total_interactions"] += 1
+            if first_timestamp is None:
+                first_timestamp = interaction["timestamp"]
+            last_timestamp = interaction["timestamp"]
+
+        if first_timestamp is not None:
+            # ISO 8601形式（区切りが空白の旧形式も可）
+            duration = datetime.fromisoformat(last_timestamp) - datetime.fromisoformat(
+                first_timestamp
             )
-            last_timestamp = datetime.strptime(
-                interactions[-1]["timestamp"], "%Y-%m-%d %H:%M:%S"
-            )
-            stats["generation_duration"] = str(last_timestamp - first_timestamp)
+            stats["generation_duration"] = str(duration)
 
         # フェーズごとの分析
-        for entry in thinking_timeline:
+        samples: Dict[str, deque] = {}
+        for entry in self.iter_thinking_process():
+            stats["total_thinking_processes"] += 1
             phase = entry["phase"]
             if phase not in stats["phases"]:
-                stats["phases"][phase] = {"count": 0, "thinking_samples": []}
+                stats["phases"][phase] = {"count": 0}
+                if include_samples:
+                    samples[phase] = deque(maxlen=sample_limit)
             stats["phases"][phase]["count"] += 1
-            stats["phases"][phase]["thinking_samples"].append(entry["thinking"])
+            if include_samples:
+                samples[phase].append(entry["thinking"])
+
+        for phase, phase_samples in samples.items():
+            stats["phases"][phase]["thinking_samples"] = list(phase_samples)
 
         return stats
 
-    def analyze_length_progress(self) -> Dict[str, Any]:
+    def analyze_length_progress(self, include_history: bool = False) -> Dict[str, Any]:
         """文字数の進捗状況を分析
 
+        Args:
+            include_history (bool, optional): 全行の履歴（progress_history）を
+                結果に含めるか. 履歴は列名ごとの値のリストで返す. デフォルトはFalse.
+
         Returns:
             Dict[str, Any]: 文字数の進捗分析結果
         """
-        progress_data = []
         try:
-            with open(self.length_log_file, "r", encoding="utf-8") as f:
+            with open(self.length_log_file, "r", encoding="utf-8", newline="") as f:
+                reader = csv.reader(f)
                 # ヘッダーをスキップ
-                next(f)
-                next(f)
-
-                for line in f:
-                    if line.strip():
-                        timestamp, section, current, target, percentage = (
-                            line.strip().split(",")
-                        )
-                        progress_data.append({
-                            "timestamp": timestamp,
-                            "section": int(section),
-                            "current_length": int(current),
-                            "target_length": int(target),
-                            "percentage": float(percentage.strip("%")),
-                        })
-
-            if not progress_data:
+                next(reader)
+                next(reader)
+
+                if include_history:
+                    rows = [row for row in reader if row]
+                    last_row = rows[-1] if rows else None
+                    row_count = len(rows)
+                else:
+                    # 集計には最後の行と行数のみを使う
+                    last_row = None
+                    row_count = 0
+                    for row in reader:
+                        if not row:
+                            continue
+                        last_row = row
+                        row_count += 1
+
+            if last_row is None:
                 return {"error": "進捗データが見つかりません"}
 
-            latest = progress_data[-1]
+            latest = self._parse_length_row(last_row)
 
             # 分析結果の作成
             analysis = {
@@ -146,29 +212,55 @@ class LogAnalyzer:
                     "remaining_length": latest["target_length"]
                     - latest["current_length"],
                 },
-                "progress_history": progress_data,
                 "section_analysis": {
-                    "total_sections": len(progress_data),
+                    "total_sections": row_count,
                     "average_length_per_section": latest["current_length"]
-                    / len(progress_data)
-                    if progress_data
-                    else 0,
+                    / row_count,
                 },
                 "pace_analysis": {
                     "estimated_sections_needed": int(
                         (latest["target_length"] - latest["current_length"])
-                        / (latest["current_length"] / len(progress_data))
+                        / (latest["current_length"] / row_count)
                     )
-                    if progress_data and latest["current_length"] > 0
+                    if latest["current_length"] > 0
                     else 0
                 },
             }
+            if include_history:
+                analysis["progress_history"] = self._parse_length_columns(rows)
 
             return analysis
 
         except Exception as e:
             return {"error": f"分析中にエラーが発生しました: {str(e)}"}
 
+    @staticmethod
+    def _parse_length_columns(rows: List[List[str]]) -> Dict[str, List[Any]]:
+        """文字数ログの全行を列ごとのリストに変換
+
+        行ごとに辞書を作らず、列単位でまとめて数値に変換する。
+        """
+        timestamps, sections, currents, targets, percentages = zip(*rows)
+        return {
+            "timestamp": list(timestamps),
+            "section": list(map(int, sections)),
+            "current_length": list(map(int, currents)),
+            "target_length": list(map(int, targets)),
+            "percentage": [float(percentage.strip("%")) for percentage in percentages],
+        }
+
+    @staticmethod
+    def _parse_length_row(row: List[str]) -> Dict[str, Any]:
+        """文字数ログの1行を解析"""
+        timestamp, section, current, target, percentage = row
+        return {
+            "timestamp": timestamp,
+            "section": int(section),
+            "current_length": int(current),
+            "target_length": int(target),
+            "percentage": float(percentage.strip("%")),
+        }
+
     def get_length_progress_summary(self) -> str:
         """文字数の進捗サマリーを取得
 
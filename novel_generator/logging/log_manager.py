@@ -1,87 +1,252 @@
 import os
+import queue
+import threading
+import time
 from datetime import datetime
-import json
-from typing import Dict, Any
+from pathlib import Path
+from typing import BinaryIO, Dict, Any, List
 import logging
 
+import orjson
+
 logger = logging.getLogger(__name__)
 
+# 書き込みスレッドを終了させるための目印
+_STOP = object()
+
 
 class LogManager:
-    def __init__(self, output_dir: str, parser):
-        self.output_dir = output_dir
+    # ログエントリの区切り線
+    _SEP = "=" * 50
+
+    # ログエントリの固定部分（バイナリモードで書き込むため事前にエンコードしておく）
+    _PHASE_PREFIX_B = b"\n=== "
+    _PHASE_SUFFIX_B = b" ===\nTimestamp: "
+    _THINKING_HEAD_B = "\n\n思考プロセス:\n".encode("utf-8")
+    _PROMPT_HEAD_B = b"\n\n--- Prompt ---\n"
+    _RESPONSE_HEAD_B = b"\n\n--- Response ---\n"
+    _ENTRY_END_B = b"\n\n" + _SEP.encode("utf-8") + b"\n"
+
+    def __init__(self, output_dir: Path, parser):
+        self.output_dir = Path(output_dir)
         self.parser = parser
         self._ensure_output_directory()
 
-        self.raw_log_file = os.path.join(output_dir, "raw_llm_output.log")
-        self.thinking_file = os.path.join(output_dir, "thinking_process.txt")
-        self.structured_log_file = os.path.join(output_dir, "generation_log.jsonl")
+        self.raw_log_file = self.output_dir / "raw_llm_output.log"
+        self.thinking_file = self.output_dir / "thinking_process.txt"
+        self.structured_log_file = self.output_dir / "generation_log.jsonl"
+
+        # 秒単位のタイムスタンプ文字列のキャッシュ（同じ秒の間は使い回す）
+        self._timestamp_second = -1
+        self._timestamp_text = ""
+        self._timestamp_bytes = b""
+
+        # ファイルへの書き込みは専用スレッドで行い、ログ出力側はキューに積むだけにする
+        # （ファイルハンドルは書き込みスレッドだけが扱う）
+        self._write_queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._writer = None
+        self._handles: Dict[Path, BinaryIO] = {}
         self._initialize_logs()
 
+    def __enter__(self) -> "LogManager":
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        self.close()
+
+    def _open_log_file(self, path: Path, mode: str) -> BinaryIO:
+        """ログファイルをバイナリモードで書き込み用に開く（内容はUTF-8）"""
+        return open(path, mode, buffering=1 << 16)
+
     def _initialize_logs(self) -> None:
         """ログファイルの初期化"""
-        with open(self.raw_log_file, "w", encoding="utf-8") as f:
-            f.write("=== LLM Raw Output Log ===\n\n")
-
-        with open(self.thinking_file, "w", encoding="utf-8") as f:
-            f.write("=== 思考プロセスログ ===\n\n")
+        self.close()
+        with self._open_log_file(self.raw_log_file, "wb") as f:
+            f.write(b"=== LLM Raw Output Log ===\n\n")
+
+        with self._open_log_file(self.thinking_file, "wb") as f:
+            f.write("=== 思考プロセスログ ===\n\n".encode("utf-8"))
+
+    def _enqueue(self, path: Path, parts: List[bytes]) -> None:
+        """書き込み内容をキューに積む（必要なら書き込みスレッドを起動）"""
+        if self._writer is None:
+            self._writer = threading.Thread(
+                target=self._run_writer, name="LogManagerWriter", daemon=True
+            )
+            self._writer.start()
+        self._write_queue.put((path, parts))
+
+    def _run_writer(self) -> None:
+        """キューに積まれた書き込みを順にファイルへ反映する"""
+        while True:
+            # 溜まっている分をまとめて取り出し、バッファ経由で書き込む
+            items = [self._write_queue.get()]
+            while True:
+                try:
+                    items.append(self._write_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for item in items:
+                if item is _STOP:
+                    self._close_handles()
+                    return
+
+                path, parts = item
+                if path is None:
+                    # flush要求（partsは完了を通知するEvent）。失敗しても待機側は必ず起こす
+                    try:
+                        self._flush_handles()
+                    finally:
+                        parts.set()
+                    continue
+
+                try:
+                    fh = self._handles.get(path)
+                    if fh is None:
+                        fh = self._handles[path] = self._open_log_file(path, "ab")
+                    fh.writelines(parts)
+                except Exception as e:
+                    # 壊れたハンドルは捨て、次の書き込みで開き直す
+                    logger.error(f"ログの書き込みに失敗: {path}: {str(e)}")
+                    self._discard_handle(path)
+
+    def _discard_handle(self, path: Path) -> None:
+        """ファイルハンドルを閉じて破棄（閉じる際のエラーは無視する）"""
+        fh = self._handles.pop(path, None)
+        if fh is None:
+            return
+        try:
+            fh.close()
+        except Exception:
+            pass
+
+    def _flush_handles(self) -> None:
+        """書き込みスレッドで開いているファイルをフラッシュ"""
+        for path, fh in list(self._handles.items()):
+            try:
+                fh.flush()
+            except Exception as e:
+                logger.error(f"ログのフラッシュに失敗: {path}: {str(e)}")
+                self._discard_handle(path)
+
+    def _close_handles(self) -> None:
+        """書き込みスレッドで開いているファイルを閉じる"""
+        for path, fh in list(self._handles.items()):
+            try:
+                fh.close()
+            except Exception as e:
+                logger.error(f"ログのクローズに失敗: {path}: {str(e)}")
+        self._handles.clear()
+
+    def flush(self) -> None:
+        """キューに積まれたログをすべてファイルに書き出すまで待つ"""
+        if self._writer is None:
+            return
+        done = threading.Event()
+        self._write_queue.put((None, done))
+        # 書き込みスレッドが予期せず終了していても待ち続けない
+        while not done.wait(0.5):
+            if not self._writer.is_alive():
+                logger.error("ログの書き込みスレッドが停止しています")
+                return
+
+    def close(self) -> None:
+        """ログを書き出してファイルを閉じる（以降の書き込みでは開き直す）"""
+        if self._writer is None:
+            return
+        self._write_queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
+
+    def _format_timestamp(self) -> str:
+        """ログ用のタイムスタンプ文字列を取得（ISO 8601、秒単位）"""
+        second = int(time.time())
+        if second != self._timestamp_second:
+            self._timestamp_second = second
+            self._timestamp_text = datetime.fromtimestamp(second).isoformat(
+                timespec="seconds"
+            )
+            self._timestamp_bytes = self._timestamp_text.encode("ascii")
+        return self._timestamp_text
+
+    def _format_timestamp_bytes(self) -> bytes:
+        """ログ用のタイムスタンプをエンコード済みのバイト列で取得"""
+        self._format_timestamp()
+        return self._timestamp_bytes
 
     def log_thinking_process(self, phase: str, thinking: str) -> None:
         """思考プロセスの記録"""
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        content = f"""
-=== {phase} ===
-Timestamp: {timestamp}
-
-思考プロセス:
-{thinking}
-
-{"=" * 50}
-"""
-        with open(self.thinking_file, "a", encoding="utf-8") as f:
-            f.write(content)
+        self._log_thinking_with_ts(phase, thinking, self._format_timestamp_bytes())
+
+    def _log_thinking_with_ts(
+        self, phase: str, thinking: str, timestamp: bytes
+    ) -> None:
+        """タイムスタンプを指定して思考プロセスを記録"""
+        # 長い本文を中間文字列にコピーしないよう、部品のまま書き込みスレッドへ渡す
+        self._enqueue(
+            self.thinking_file,
+            [
+                self._PHASE_PREFIX_B,
+                phase.encode("utf-8"),
+                self._PHASE_SUFFIX_B,
+                timestamp,
+                self._THINKING_HEAD_B,
+                thinking.encode("utf-8"),
+                self._ENTRY_END_B,
+            ],
+        )
 
     def log_llm_interaction(self, phase: str, prompt: str, response: str) -> None:
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        timestamp = self._format_timestamp_bytes()
 
         # 思考プロセスの抽出と記録
         thinking = self.parser.extract_tag_content(response, "thinking")
         if thinking:
-            self.log_thinking_process(phase, thinking)  # thinking_processの記録を追加
-
-        log_content = f"""
-=== {phase} ===
-Timestamp: {timestamp}
-
---- Prompt ---
-{prompt}
-
---- Response ---
-{response}
-
-{"=" * 50}
-"""
-        with open(self.raw_log_file, "a", encoding="utf-8") as f:
-            f.write(log_content)
+            # 生ログと同じタイムスタンプで記録する
+            self._log_thinking_with_ts(phase, thinking, timestamp)
+
+        self._enqueue(
+            self.raw_log_file,
+            [
+                self._PHASE_PREFIX_B,
+                phase.encode("utf-8"),
+                self._PHASE_SUFFIX_B,
+                timestamp,
+                self._PROMPT_HEAD_B,
+                prompt.encode("utf-8"),
+                self._RESPONSE_HEAD_B,
+                response.encode("utf-8"),
+                self._ENTRY_END_B,
+            ],
+        )
 
     def _ensure_output_directory(self) -> None:
         """出力ディレクトリの確保"""
-        if not os.path.exists(self.output_dir):
-            os.makedirs(self.output_dir)
-            logger.info(f"出力ディレクトリを作成しました: {self.output_dir}")
+        os.makedirs(self.output_dir, exist_ok=True)
 
-    def log_structured_data(self, phase: str, data: Dict[str, Any]) -> None:
+    def log_structured_data(self, phase: str, data: Any) -> None:
         """構造化データの記録
 
+        データクラスやdatetimeは辞書や文字列に変換せずにそのまま渡せる
+        （orjsonがフィールドを直接シリアライズする）。
+
         Args:
             phase (str): 処理フェーズ名
-            data (Dict[str, Any]): 記録するデータ
+            data (Any): 記録するデータ（辞書またはデータクラス）
         """
         log_entry = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": self._format_timestamp(),
             "phase": phase,
             "data": data,
         }
-        with open(self.structured_log_file, "a", encoding="utf-8") as f:
-            json.dump(log_entry, f, ensure_ascii=False)
-            f.write("\n\n")
+        # 1行1レコードのJSONLとして書き込む
+        self._enqueue(
+            self.structured_log_file,
+            [
+                orjson.dumps(
+                    log_entry,
+                    option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE,
+                )
+            ],
+        )
@@ -1,24 +1,46 @@
+import atexit
 import logging
+import logging.handlers
 import os
+import queue
+from pathlib import Path
 
 
-def setup_logging(output_dir: str, log_level: int = logging.INFO) -> None:
+def setup_logging(output_dir: Path, log_level: int = logging.INFO) -> None:
     """ロギングの初期設定
 
+    ファイルへの書き込みはQueueListenerのスレッドで行い、
+    ログ出力側はキューに積むだけにする。
+
     Args:
-        output_dir (str): ログファイル出力ディレクトリ
+        output_dir (Path): ログファイル出力ディレクトリ
         log_level (int): ログレベル（デフォルト: logging.INFO）
     """
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    os.makedirs(output_dir, exist_ok=True)
+
+    # ルートロガーが設定済みの場合はbasicConfigが何もしないため、
+    # 使われないファイルハンドラや書き込みスレッドを作らない
+    if logging.getLogger().handlers:
+        return
+
+    # 書式はQueueHandler側で適用されるため、ファイルハンドラはそのまま書き出す
+    log_queue = queue.SimpleQueue()
+    file_handler = logging.FileHandler(
+        Path(output_dir) / "novel_generation.log", encoding="utf-8"
+    )
 
     logging.basicConfig(
         level=log_level,
         format="%(asctime)s [%(levelname)s] %(message)s",
         handlers=[
             logging.StreamHandler(),
-            logging.FileHandler(
-                os.path.join(output_dir, "novel_generation.log"), encoding="utf-8"
-            ),
+            logging.handlers.QueueHandler(log_queue),
         ],
     )
+
+    listener = logging.handlers.QueueListener(
+        log_queue, file_handler, respect_handler_level=True
+    )
+    listener.start()
+    # 終了時にキューに残ったログを書き出してから止める
+    atexit.register(listener.stop)
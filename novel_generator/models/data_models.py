@@ -1,9 +1,11 @@
-from dataclasses import asdict, dataclass, field
+import json
+from collections import deque
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Deque, Dict, List, Optional, Tuple
 
 
-@dataclass
+@dataclass(slots=True)
 class Progress:
     """進行状況を表すデータクラス"""
 
@@ -11,8 +13,16 @@ class Progress:
     achieved_points: List[str]
     remaining_points: List[str]
 
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換"""
+        return {
+            "percentage": self.percentage,
+            "achieved_points": self.achieved_points,
+            "remaining_points": self.remaining_points,
+        }
 
-@dataclass
+
+@dataclass(slots=True)
 class SectionData:
     """セクションデータを表すデータクラス"""
 
@@ -21,8 +31,17 @@ class SectionData:
     next_preview: str
     thinking: str
 
+    def to_dict(self) -> Dict[str, Any]:
+        """辞書形式に変換"""
+        return {
+            "content": self.content,
+            "progress": self.progress.to_dict(),
+            "next_preview": self.next_preview,
+            "thinking": self.thinking,
+        }
+
 
-@dataclass
+@dataclass(slots=True)
 class Character:
     """キャラクター情報を表すデータクラス"""
 
@@ -32,10 +51,10 @@ class Character:
 
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式に変換"""
-        return asdict(self)
+        return {"name": self.name, "role": self.role, "personality": self.personality}
 
 
-@dataclass
+@dataclass(slots=True)
 class StoryBaseSettings:
     """物語の基本設定を表すデータクラス"""
 
@@ -49,14 +68,14 @@ class StoryBaseSettings:
         """辞書形式に変換"""
         return {
             "themes": self.themes,
-            "characters": [c.to_dict() for c in self.characters],
+            "characters": list(map(Character.to_dict, self.characters)),
             "world_setting": self.world_setting,
             "tone": self.tone,
             "thinking_process": self.thinking_process,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class PlanAdjustment:
     """計画の調整内容を表すデータクラス"""
 
@@ -77,7 +96,7 @@ class PlanAdjustment:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StoryPlan:
     """物語の展開計画を表すデータクラス"""
 
@@ -86,12 +105,21 @@ class StoryPlan:
     sections: List["StorySection"]
     foreshadowing: List[str]
     thinking_process: str
-    adjustments: List[PlanAdjustment] = field(default_factory=list)
+    # 調整履歴（追加と最新の参照のみのためdequeで保持）
+    adjustments: Deque[PlanAdjustment] = field(default_factory=deque)
+    # 計画が調整されるたびに増加するバージョン番号
+    plan_version: int = field(default=0, init=False, repr=False, compare=False)
+    # get_current_plan_stateの結果と、その時点のバージョン番号
+    _plan_state: Optional[Dict[str, Any]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _plan_state_version: int = field(default=-1, init=False, repr=False, compare=False)
 
     def add_adjustment(self, adjustment: PlanAdjustment) -> None:
         """計画の調整を追加"""
         self.adjustments.append(adjustment)
         self._apply_adjustment(adjustment)
+        self.plan_version += 1
 
     def _apply_adjustment(self, adjustment: PlanAdjustment) -> None:
         """調整内容を現在の計画に適用"""
@@ -116,8 +144,10 @@ class StoryPlan:
             point.strip() for point in adjustments.split("\n") if point.strip()
         ]
         # 既存のポイントは維持しつつ、新しいポイントを追加
+        existing_points = set(self.major_points)
         for point in new_points:
-            if point not in self.major_points:
+            if point not in existing_points:
+                existing_points.add(point)
                 self.major_points.append(point)
 
     def get_latest_adjustment(self) -> Optional[PlanAdjustment]:
@@ -125,57 +155,70 @@ class StoryPlan:
         return self.adjustments[-1] if self.adjustments else None
 
     def get_current_plan_state(self) -> Dict[str, Any]:
-        """現在の計画状態を取得"""
+        """現在の計画状態を取得
+
+        計画はadd_adjustmentを通して更新されるため、結果は
+        plan_versionが変わるまで使い回す（返した辞書は変更しないこと）。
+        """
+        if (
+            self._plan_state is not None
+            and self._plan_state_version == self.plan_version
+        ):
+            return self._plan_state
+
         latest_adjustment = self.get_latest_adjustment()
-        return {
+        self._plan_state = {
             "outline": self.outline,
             "major_points": self.major_points,
-            "sections": [s.to_dict() for s in self.sections],
+            "sections": list(map(StorySection.to_dict, self.sections)),
             "foreshadowing": self.foreshadowing,
             "thinking_process": self.thinking_process,
             "latest_adjustment": latest_adjustment.to_dict()
             if latest_adjustment
             else None,
         }
+        self._plan_state_version = self.plan_version
+        return self._plan_state
 
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式に変換"""
         return {
             "outline": self.outline,
             "major_points": self.major_points,
-            "sections": [s.to_dict() for s in self.sections],
+            "sections": list(map(StorySection.to_dict, self.sections)),
             "foreshadowing": self.foreshadowing,
             "thinking_process": self.thinking_process,
-            "adjustments": [adj.to_dict() for adj in self.adjustments],
+            "adjustments": list(map(PlanAdjustment.to_dict, self.adjustments)),
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StorySection:
     """計画されたセクションを表すデータクラス"""
 
     content: str
     goals: str
-    adjusted_goals: List[str] = field(default_factory=list)
+    # 計画の見直しで上書きされた現在の目標（未調整ならNone）
+    adjusted_goal: Optional[str] = None
 
     def set_current_goals(self, new_goals: str) -> None:
         """現在の目標を設定（上書き）"""
-        self.adjusted_goals = [new_goals] if new_goals else []
+        self.adjusted_goal = new_goals or None
 
     def get_current_goals(self) -> str:
         """現在の目標を取得"""
-        return self.adjusted_goals[-1] if self.adjusted_goals else self.goals
+        return self.adjusted_goal or self.goals
 
     def to_dict(self) -> Dict[str, Any]:
         """辞書形式に変換"""
         return {
             "content": self.content,
             "goals": self.goals,
-            "adjusted_goals": self.adjusted_goals,
+            "adjusted_goal": self.adjusted_goal,
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class GenerationMetadata:
     """生成メタデータを表すデータクラス"""
 
@@ -196,7 +239,7 @@ class GenerationMetadata:
         }
 
 
-@dataclass
+@dataclass(slots=True)
 class StoryContext:
     """物語のコンテキストを表すデータクラス"""
 
@@ -207,3 +250,90 @@ class StoryContext:
     sections: List[SectionData] = field(default_factory=list)
     progress: float = 0.0
     current_length: int = 0
+    # 古いセクションを要約したあらすじと、あらすじに含めたセクション数
+    content_digest: str = ""
+    digest_section_count: int = 0
+
+    # これまでの本文を連結した文字列（セクション追加ごとに末尾へ追記）
+    _joined_content: str = field(default="", init=False, repr=False, compare=False)
+
+    # プロンプト用JSONのキャッシュ
+    _base_settings_json: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _base_settings_json_source: Optional[StoryBaseSettings] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _story_plan_json: Optional[str] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _story_plan_json_key: Optional[Tuple[StoryPlan, int]] = field(
+        default=None, init=False, repr=False, compare=False
+    )
+
+    def reset(self, total_length: str) -> None:
+        """新しい物語の生成に向けて状態を初期化（オブジェクトは使い回す）
+
+        Args:
+            total_length (str): 想定される物語の長さ
+        """
+        self.total_length = total_length
+        self.base_settings = None
+        self.story_plan = None
+        self.sections = []
+        self.progress = 0.0
+        self.current_length = 0
+        self.content_digest = ""
+        self.digest_section_count = 0
+        self._joined_content = ""
+
+    def add_section(self, section_data: SectionData) -> None:
+        """セクションを追加し、連結済みの本文と文字数を更新"""
+        self.sections.append(section_data)
+        if len(self.sections) == 1:
+            self._joined_content = section_data.content
+        else:
+            self._joined_content += "\n\n" + section_data.content
+        self.current_length += len(section_data.content)
+
+    def update_digest(self, digest: str, section_count: int) -> None:
+        """あらすじを更新
+
+        Args:
+            digest (str): 先頭からsection_count個のセクションのあらすじ
+            section_count (int): あらすじに含めたセクション数
+        """
+        self.content_digest = digest
+        self.digest_section_count = section_count
+
+    def get_joined_content(self) -> str:
+        """これまでの本文を連結した文字列を取得"""
+        return self._joined_content
+
+    @property
+    def base_settings_json(self) -> str:
+        """基本設定のJSON文字列（base_settingsが差し替えられるまでキャッシュ）"""
+        if (
+            self._base_settings_json is None
+            or self._base_settings_json_source is not self.base_settings
+        ):
+            self._base_settings_json = json.dumps(
+                self.base_settings.to_dict(), ensure_ascii=False, indent=2
+            )
+            self._base_settings_json_source = self.base_settings
+        return self._base_settings_json
+
+    @property
+    def story_plan_json(self) -> str:
+        """現在の計画状態のJSON文字列（計画が調整されるまでキャッシュ）"""
+        key = self._story_plan_json_key
+        if (
+            self._story_plan_json is None
+            or key[0] is not self.story_plan
+            or key[1] != self.story_plan.plan_version
+        ):
+            self._story_plan_json = json.dumps(
+                self.story_plan.get_current_plan_state(), ensure_ascii=False, indent=2
+            )
+            self._story_plan_json_key = (self.story_plan, self.story_plan.plan_version)
+        return self._story_plan_json